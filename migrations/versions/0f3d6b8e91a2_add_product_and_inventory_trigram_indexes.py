@@ -0,0 +1,34 @@
+"""add trigram indexes for product and inventory search
+
+Revision ID: 0f3d6b8e91a2
+Revises: e8c2a5f1d374
+Create Date: 2026-10-15 15:32:08.164523
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0f3d6b8e91a2'
+down_revision = 'e8c2a5f1d374'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Trigram indexes only exist on PostgreSQL; other backends keep scanning for substring search
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_product_name_trgm', 'product', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_product_sku_trgm', 'product', ['sku'], unique=False, postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'})
+    op.create_index('ix_inventory_location_trgm', 'inventory', ['location'], unique=False, postgresql_using='gin', postgresql_ops={'location': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_inventory_location_trgm', table_name='inventory', postgresql_using='gin')
+    op.drop_index('ix_product_sku_trgm', table_name='product', postgresql_using='gin')
+    op.drop_index('ix_product_name_trgm', table_name='product', postgresql_using='gin')
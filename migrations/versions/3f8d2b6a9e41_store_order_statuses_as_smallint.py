@@ -0,0 +1,66 @@
+"""store order statuses as smallint
+
+Revision ID: 3f8d2b6a9e41
+Revises: c4e7a91f0d26
+Create Date: 2026-10-15 11:02:37.418206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8d2b6a9e41'
+down_revision = 'c4e7a91f0d26'
+branch_labels = None
+depends_on = None
+
+# Mirrors src.models.order.OrderStatus; spelled out so the migration doesn't depend on app code
+STATUS_CODES = {'Pending': 1, 'Processing': 2, 'Shipped': 3, 'Delivered': 4, 'Cancelled': 5}
+
+
+def upgrade():
+    for table_name in ('order', 'order_item'):
+        table = sa.table(table_name, sa.column('status', sa.String))
+        # Rewrite the labels as codes first; anything unrecognised falls back to Pending
+        op.execute(table.update().values(status=sa.case(
+            {label: str(code) for label, code in STATUS_CODES.items()}, value=table.c.status, else_='1'
+        )))
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.alter_column('status',
+               existing_type=sa.String(length=50),
+               type_=sa.SmallInteger(),
+               existing_nullable=False,
+               postgresql_using='status::smallint')
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.alter_column('status',
+               existing_type=sa.String(length=50),
+               type_=sa.SmallInteger(),
+               existing_nullable=False,
+               existing_server_default=sa.text("'Pending'"),
+               server_default='1',
+               postgresql_using='status::smallint')
+
+
+def downgrade():
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.alter_column('status',
+               existing_type=sa.SmallInteger(),
+               type_=sa.String(length=50),
+               existing_nullable=False,
+               existing_server_default=sa.text("'1'"),
+               server_default='Pending')
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.alter_column('status',
+               existing_type=sa.SmallInteger(),
+               type_=sa.String(length=50),
+               existing_nullable=False)
+
+    for table_name in ('order', 'order_item'):
+        table = sa.table(table_name, sa.column('status', sa.String))
+        op.execute(table.update().values(status=sa.case(
+            {str(code): label for label, code in STATUS_CODES.items()}, value=table.c.status, else_='Pending'
+        )))
@@ -0,0 +1,32 @@
+"""add trigram indexes for order customer search
+
+Revision ID: a41f7c93e05d
+Revises: 6e0b9d4a2c17
+Create Date: 2026-10-15 14:36:12.508371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f7c93e05d'
+down_revision = '6e0b9d4a2c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Trigram indexes only exist on PostgreSQL; other backends keep scanning for substring search
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_order_customer_name_trgm', 'order', ['customer_name'], unique=False, postgresql_using='gin', postgresql_ops={'customer_name': 'gin_trgm_ops'})
+    op.create_index('ix_order_customer_email_trgm', 'order', ['customer_email'], unique=False, postgresql_using='gin', postgresql_ops={'customer_email': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_order_customer_email_trgm', table_name='order', postgresql_using='gin')
+    op.drop_index('ix_order_customer_name_trgm', table_name='order', postgresql_using='gin')
@@ -0,0 +1,36 @@
+"""add product supplier/name, product category and order user/date indexes
+
+Revision ID: e8c2a5f1d374
+Revises: a41f7c93e05d
+Create Date: 2026-10-15 15:10:44.731920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c2a5f1d374'
+down_revision = 'a41f7c93e05d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # On PostgreSQL the indexes are built CONCURRENTLY, outside the migration transaction, so writes
+    # to product and order keep flowing while they build
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.create_index('ix_product_supplier_name', 'product', ['supplier_id', 'name'], unique=False, postgresql_concurrently=concurrently)
+        op.create_index(op.f('ix_product_category'), 'product', ['category'], unique=False, postgresql_concurrently=concurrently)
+        op.create_index('ix_order_user_date', 'order', ['user_id', 'order_date'], unique=False, postgresql_concurrently=concurrently)
+        op.drop_index(op.f('ix_order_user_id'), table_name='order', postgresql_concurrently=concurrently)
+
+
+def downgrade():
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_order_user_id'), 'order', ['user_id'], unique=False, postgresql_concurrently=concurrently)
+        op.drop_index('ix_order_user_date', table_name='order', postgresql_concurrently=concurrently)
+        op.drop_index(op.f('ix_product_category'), table_name='product', postgresql_concurrently=concurrently)
+        op.drop_index('ix_product_supplier_name', table_name='product', postgresql_concurrently=concurrently)
@@ -0,0 +1,97 @@
+from flask import current_app, session
+from flask_login import current_user
+
+# Shopping carts. With Redis-backed sessions (SESSION_REDIS_URL) each cart is a Redis hash, cart:<user_id>
+# mapping product id -> quantity, so a change is one atomic HINCRBY/HSET/HDEL on that line instead of
+# re-serialising the whole session; the key expires with the session lifetime. Without Redis the cart stays
+# in the session as [[product_id, quantity], ...] int pairs. Either way callers see {product_id: quantity}.
+
+def cart_redis():
+    return current_app.config.get("SESSION_REDIS")
+
+def cart_key(user_id):
+    return f"cart:{user_id}"
+
+def cart_ttl():
+    return int(current_app.config["PERMANENT_SESSION_LIFETIME"].total_seconds())
+
+def get_session_cart():
+    # Carts saved in the older {"<product_id>": quantity} shape are still read
+    cart = session.get("cart") or []
+    if isinstance(cart, dict):
+        return {int(product_id): quantity for product_id, quantity in cart.items()}
+    return dict(cart)
+
+def save_session_cart(cart):
+    session["cart"] = [[product_id, quantity] for product_id, quantity in cart.items()]
+    session.modified = True
+
+def get_cart():
+    redis = cart_redis()
+    if redis is None:
+        return get_session_cart()
+    return {int(product_id): int(quantity) for product_id, quantity in redis.hgetall(cart_key(current_user.id)).items()}
+
+def cart_size():
+    # Number of lines, for the nav badge: HLEN rather than reading the whole hash
+    redis = cart_redis()
+    if redis is None:
+        return len(session.get("cart") or ())
+    if not current_user.is_authenticated:
+        return 0
+    return redis.hlen(cart_key(current_user.id))
+
+def add_cart_item(product_id, quantity):
+    redis = cart_redis()
+    if redis is None:
+        cart = get_session_cart()
+        cart[product_id] = cart.get(product_id, 0) + quantity
+        save_session_cart(cart)
+        return
+    key = cart_key(current_user.id)
+    redis.pipeline().hincrby(key, product_id, quantity).expire(key, cart_ttl()).execute()
+
+def set_cart_item(product_id, quantity):
+    # A quantity of 0 or less removes the line
+    if quantity <= 0:
+        remove_cart_item(product_id)
+        return
+    redis = cart_redis()
+    if redis is None:
+        cart = get_session_cart()
+        cart[product_id] = quantity
+        save_session_cart(cart)
+        return
+    key = cart_key(current_user.id)
+    redis.pipeline().hset(key, product_id, quantity).expire(key, cart_ttl()).execute()
+
+def remove_cart_item(product_id):
+    # Returns whether the product was in the cart
+    redis = cart_redis()
+    if redis is None:
+        cart = get_session_cart()
+        if product_id not in cart:
+            return False
+        cart.pop(product_id)
+        save_session_cart(cart)
+        return True
+    return redis.hdel(cart_key(current_user.id), product_id) > 0
+
+def save_cart(cart):
+    # Replaces the whole cart, e.g. after lines were capped or dropped for stock
+    redis = cart_redis()
+    if redis is None:
+        save_session_cart(cart)
+        return
+    key = cart_key(current_user.id)
+    pipeline = redis.pipeline().delete(key)
+    if cart:
+        pipeline.hset(key, mapping=cart).expire(key, cart_ttl())
+    pipeline.execute()
+
+def clear_cart_items():
+    redis = cart_redis()
+    if redis is None:
+        session.pop("cart", None)
+        return
+    redis.delete(cart_key(current_user.id))
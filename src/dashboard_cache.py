@@ -0,0 +1,48 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from src.models.inventory import Inventory
+from src.models.order import Order, OrderItem
+from src.models.product import Product
+from src.models.supplier import Supplier
+
+# Cached dashboard data (the API's overview/analytics keys, the dashboard page's memoized aggregates) is
+# derived from these tables. A write to any of them, row-by-row or bulk, marks the session, and the caches
+# are cleared once that transaction commits: clearing earlier would let a concurrent reader refill them
+# with the pre-write values until the timeout.
+DASHBOARD_MODELS = (Order, OrderItem, Inventory, Supplier, Product)
+
+dashboard_cache_clearers = []
+
+def register_dashboard_cache(clear):
+    # clear() drops one module's cached dashboard data; returned so it can be used as a decorator
+    dashboard_cache_clearers.append(clear)
+    return clear
+
+def clear_dashboard_caches():
+    for clear in dashboard_cache_clearers:
+        clear()
+
+def mark_dashboard_write(mapper, connection, target):
+    object_session(target).info["dashboard_write"] = True
+
+for _model in DASHBOARD_MODELS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, mark_dashboard_write)
+
+@event.listens_for(Session, "do_orm_execute")
+def mark_dashboard_bulk_write(orm_execute_state):
+    # Bulk statements skip the mapper events above
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in DASHBOARD_MODELS:
+        orm_execute_state.session.info["dashboard_write"] = True
+
+@event.listens_for(Session, "after_commit")
+def clear_dashboard_caches_after_commit(session):
+    if session.info.pop("dashboard_write", False):
+        clear_dashboard_caches()
+
+@event.listens_for(Session, "after_rollback")
+def forget_dashboard_write(session):
+    session.info.pop("dashboard_write", None)
@@ -1,3 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+from flask_wtf.csrf import CSRFProtect
+from flask_bcrypt import Bcrypt
+from flask_caching import Cache
 
+# Single home for the Flask extension instances. Models, routes and create_app all import from here,
+# so there is exactly one SQLAlchemy instance (one engine/pool, one metadata, one identity map).
+# Flask-Migrate is registered by create_app only under the flask CLI, to keep Alembic out of app boot.
 db = SQLAlchemy()
+login_manager = LoginManager()
+csrf = CSRFProtect()
+bcrypt = Bcrypt()
+cache = Cache()
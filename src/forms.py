@@ -2,6 +2,15 @@ from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, SubmitField, TextAreaField, EmailField, FloatField, IntegerField, SelectField, PasswordField, BooleanField
 from wtforms.validators import DataRequired, Email, Length, Optional, NumberRange, EqualTo
+from src.models.order import ORDER_STATUS_LABELS
+
+# Static choice lists, built once at import and shared by every form instance
+ORDER_STATUS_CHOICES = tuple((label, label) for label in ORDER_STATUS_LABELS)
+ROLE_CHOICES = (
+    ("user", "User (View Inventory, Place Orders)"),
+    ("supplier", "Supplier (Manage Own Products & Supplier Profile)")
+)
+ADJUSTMENT_TYPE_CHOICES = (("increase", "Increase Stock"), ("decrease", "Decrease Stock"))
 
 class SupplierForm(FlaskForm):
     name = StringField("Supplier Name", validators=[DataRequired(), Length(min=2, max=100)])
@@ -27,10 +36,7 @@ class RegistrationForm(FlaskForm):
     email = EmailField("Login Email", validators=[DataRequired(), Email()])
     password = PasswordField("Password", validators=[DataRequired(), Length(min=6)])
     confirm_password = PasswordField("Confirm Password", validators=[DataRequired(), EqualTo("password", message="Passwords must match.")])
-    role = SelectField("Register as", choices=[
-        ("user", "User (View Inventory, Place Orders)"),
-        ("supplier", "Supplier (Manage Own Products & Supplier Profile)")
-    ], validators=[DataRequired()], default="user")
+    role = SelectField("Register as", choices=ROLE_CHOICES, validators=[DataRequired()], default="user")
     submit = SubmitField("Sign Up")
 
 class LoginForm(FlaskForm):
@@ -47,7 +53,7 @@ class AddInventoryItemForm(FlaskForm):
     submit = SubmitField("Add Inventory Item")
 
 class AdjustStockForm(FlaskForm):
-    adjustment_type = SelectField("Adjustment Type", choices=[("increase", "Increase Stock"), ("decrease", "Decrease Stock")], validators=[DataRequired()])
+    adjustment_type = SelectField("Adjustment Type", choices=ADJUSTMENT_TYPE_CHOICES, validators=[DataRequired()])
     adjustment = IntegerField("Adjustment Quantity", validators=[DataRequired(), NumberRange(min=1)]) # Renamed from quantity_on_hand for clarity, and ensure it's a positive number for adjustment
     # quantity_on_hand = IntegerField("New Quantity on Hand", validators=[DataRequired(), NumberRange(min=0)]) # This field seems to be for direct edit, not adjustment. The route logic uses 'adjustment'
     # reorder_level = IntegerField("Reorder Level", validators=[DataRequired(), NumberRange(min=0)]) # Reorder level and location are usually part of general inventory edit, not stock adjustment action
@@ -66,14 +72,7 @@ class CreateOrderForm(FlaskForm):
     submit = SubmitField("Place Order")
 
 class UpdateOrderStatusForm(FlaskForm):
-    status = SelectField("Order Status", validators=[DataRequired()], 
-                         choices=[
-                             ("Pending", "Pending"), 
-                             ("Processing", "Processing"), 
-                             ("Shipped", "Shipped"), 
-                             ("Delivered", "Delivered"), 
-                             ("Cancelled", "Cancelled")
-                         ])
+    status = SelectField("Order Status", validators=[DataRequired()], choices=ORDER_STATUS_CHOICES)
     submit = SubmitField("Update Status")
 
 class UpdateProfileForm(FlaskForm):
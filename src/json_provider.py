@@ -0,0 +1,14 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# jsonify()/request.get_json() backed by orjson, which encodes in C instead of the pure-Python stdlib json.
+# Types orjson can't serialise natively (Decimal, objects with __html__, ...) fall back to Flask's default handler.
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z | orjson.OPT_SORT_KEYS # Sorted keys, as Flask's provider does
+
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if kwargs.get("indent") else 0)
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -1,19 +1,15 @@
 # Flask App Initializations
-from flask import Flask, render_template, Response
+from flask import Flask, render_template, Response, request, g
 from markupsafe import Markup
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
-from flask_migrate import Migrate 
+from sqlalchemy import event
 import os
+import sqlite3
+from datetime import timedelta
 import traceback 
 
-from flask_wtf.csrf import CSRFProtect
-
-# Initialize extensions
-db = SQLAlchemy()
-login_manager = LoginManager()
-migrate = Migrate()
-csrf = CSRFProtect() 
+# Extensions live in src/extensions.py; they are bound to the app in create_app
+from .extensions import db, login_manager, csrf, bcrypt, cache
+from .json_provider import ORJSONProvider
 
 login_manager.login_view = "frontend.login"
 login_manager.login_message_category = "info"
@@ -21,6 +17,78 @@ login_manager.login_message_category = "info"
 def nl2br(value):
     return Markup(str(value).replace('\n', '<br>\n'))
 
+# Applied to every new SQLite connection: WAL lets readers proceed while a writer holds the lock,
+# and the larger page cache / mmap window keeps hot index pages out of the syscall path.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=30000",
+)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+QUERY_CACHE_SIZE = 1200 # SQLAlchemy's default is 500
+SESSION_LIFETIME_DAYS = int(os.environ.get("SESSION_LIFETIME_DAYS", 7)) # Redis-backed sessions only
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 20)) # Per worker process; non-SQLite databases
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+
+# Uploaded profile pictures get a fresh random name on every upload, and that name only appears once the
+# finished thumbnail has been moved into place (see save_profile_picture), so the bytes behind a URL never
+# change and browsers can keep them without revalidating. The shared default image and the in-progress
+# .tmp files keep normal caching.
+PROFILE_PICTURE_MAX_AGE = 31536000 # One year
+
+def set_profile_picture_cache_headers(response):
+    filename = (request.view_args or {}).get("filename", "")
+    if request.endpoint == "static" and response.status_code in (200, 304) and filename.startswith("profile_pics/") \
+            and filename != "profile_pics/default.jpg" and not filename.endswith(".tmp"):
+        response.cache_control.no_cache = None # send_file's default when SEND_FILE_MAX_AGE_DEFAULT is unset
+        response.cache_control.public = True
+        response.cache_control.max_age = PROFILE_PICTURE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+def is_shared_cache(cache_type):
+    # Backends every worker reads from, so a write in one worker drops the entry for all of them
+    return any(name in cache_type.lower() for name in ("redis", "memcached"))
+
+# Endpoints served without ever needing the logged-in user
+ANONYMOUS_ENDPOINTS = {"static", "api.health_check"}
+
+def init_migrate(app):
+    # Flask-Migrate pulls in Alembic (~80ms of imports) and is only needed by the `flask db` commands,
+    # so it is imported and registered only when the app is loaded through the flask CLI.
+    if os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+def init_sessions(app):
+    # With SESSION_REDIS_URL set, sessions (login, cart, flashes) live in Redis and the cookie only
+    # carries a random session id. Without it, Flask's signed-cookie sessions are used as before.
+    redis_url = os.environ.get("SESSION_REDIS_URL")
+    if not redis_url:
+        return
+    from flask_session import Session
+    from redis import Redis
+    app.config["SESSION_TYPE"] = "redis"
+    app.config["SESSION_REDIS"] = Redis.from_url(redis_url)
+    # Session keys get this TTL in Redis (refreshed on each write), so abandoned carts expire on their own
+    app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=SESSION_LIFETIME_DAYS)
+    Session(app)
+
+def is_sqlite_file_uri(database_uri):
+    return database_uri.startswith("sqlite") and database_uri != "sqlite://" and ":memory:" not in database_uri
+
 # User model will be imported later, after db and login_manager are initialized within create_app context
 
 def create_app():
@@ -33,6 +101,37 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", f"sqlite:///{db_path}")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["PROPAGATE_EXCEPTIONS"] = True 
+    app.config.setdefault("CACHE_TYPE", os.environ.get("CACHE_TYPE", "SimpleCache"))
+    app.config.setdefault("CACHE_DEFAULT_TIMEOUT", 30)
+    app.config.setdefault("BCRYPT_LOG_ROUNDS", int(os.environ.get("BCRYPT_LOG_ROUNDS", 10))) # ~50-70ms per check
+    app.json = ORJSONProvider(app)
+
+    # Room for every distinct statement the app issues (dashboard, listings, APIs, with their
+    # loader-option variants), so the hot paths always hit SQLAlchemy's compiled-SQL cache
+    engine_options = {"query_cache_size": QUERY_CACHE_SIZE}
+    use_sqlite_pragmas = is_sqlite_file_uri(app.config["SQLALCHEMY_DATABASE_URI"])
+    if use_sqlite_pragmas:
+        # Pool file-backed SQLite connections so request-scoped sessions reuse open handles
+        engine_options.update({
+            "pool_pre_ping": True,
+            "pool_size": 10,
+            "max_overflow": 20,
+            "connect_args": {"timeout": 30, "check_same_thread": False},
+        })
+    elif not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        # Server databases: each worker keeps up to pool_size + max_overflow connections open, so keep
+        # the server's max_connections >= that times the number of workers. Recycling and pre-ping
+        # replace connections the server or a proxy has dropped before a request gets one.
+        engine_options.update({
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        })
+        if app.config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql+psycopg://"):
+            # psycopg 3 server-side prepares a statement after it has run this many times on a connection
+            engine_options["connect_args"] = {"prepare_threshold": 5}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
 
     try:
         os.makedirs(app.instance_path)
@@ -40,19 +139,45 @@ def create_app():
         pass 
 
     db.init_app(app)
+    bcrypt.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
     csrf.init_app(app)
+    cache.init_app(app)
+    init_sessions(app)
+    init_migrate(app)
+
+    if use_sqlite_pragmas:
+        with app.app_context():
+            event.listen(db.engine, "connect", set_sqlite_pragmas)
 
     # Import User model here, after db and login_manager are initialized and tied to app
-    from .models.user import User
+    from .models.user import User, cache_user, get_cached_user
+
+    # The cached row carries role and is_active, so it is only used where invalidation reaches every worker;
+    # with a per-process cache a demoted or deactivated user would keep their access in the other workers.
+    use_user_cache = is_shared_cache(app.config["CACHE_TYPE"])
 
     # User loader callback - defined here to avoid circular import
     @login_manager.user_loader
     def load_user(user_id):
-        if user_id is not None and user_id.isdigit():
-            return User.query.get(int(user_id))
-        return None
+        if request.endpoint in ANONYMOUS_ENDPOINTS:
+            return None # Never needs the user; skip the SELECT if something touches current_user
+        cache_key = f"_user_{user_id}"
+        user = g.get(cache_key)
+        if user is None:
+            try:
+                user_id = int(user_id)
+            except (TypeError, ValueError):
+                return None
+            user = get_cached_user(user_id) if use_user_cache else None
+            if user is not None and db.session.identity_map.get(db.session.identity_key(User, user_id)) is None:
+                db.session.add(user) # Attach the cached columns without re-reading the row
+            else:
+                user = db.session.get(User, user_id) # Identity-map lookup before hitting the database
+                if user is not None and use_user_cache:
+                    cache_user(user)
+            setattr(g, cache_key, user)
+        return user
 
     from .routes.frontend_routes import frontend_bp
     from .routes.order_processing_api import order_processing_bp
@@ -66,11 +191,14 @@ def create_app():
     app.register_blueprint(visibility_bp, url_prefix="/api/visibility")
     app.register_blueprint(api_bp)
 
+    app.after_request(set_profile_picture_cache_headers)
+
     # Register custom Jinja filters
     app.jinja_env.filters["nl2br"] = nl2br
     with app.app_context():
         # Ensure all models are imported if not already done for migrate/db operations
-        from .models import supplier, product, inventory, order 
+        from .models import supplier, product, inventory, order, dashboard_counters
+        from .models import purchase_order, shipment, supplier_interaction, notification # share the registry with the models above
         pass
 
     @app.context_processor
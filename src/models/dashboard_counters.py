@@ -0,0 +1,161 @@
+from src.extensions import db
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .inventory import Inventory
+from .order import Order
+from .product import Product
+from .supplier import Supplier
+
+# Single-row table holding the dashboard KPIs. The counters are maintained incrementally by the
+# mapper events below, so reading the overview is one primary-key lookup regardless of table size.
+COUNTERS_ROW_ID = 1
+
+class DashboardCounters(db.Model):
+    __tablename__ = "dashboard_counters"
+
+    id = db.Column(db.Integer, primary_key=True)
+    total_suppliers = db.Column(db.Integer, nullable=False, default=0)
+    total_products = db.Column(db.Integer, nullable=False, default=0)
+    open_orders = db.Column(db.Integer, nullable=False, default=0)
+    low_stock_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"DashboardCounters(Suppliers: {self.total_suppliers}, Products: {self.total_products}, Open Orders: {self.open_orders}, Low Stock: {self.low_stock_count})"
+
+
+def is_open_order(status):
+    return status == "Pending" # Same definition of "open" as the overview endpoint
+
+def is_low_stock(quantity_on_hand, reorder_level):
+    # At or below reorder level but not yet empty, matching the overview's low-stock filter
+    return quantity_on_hand is not None and reorder_level is not None and 0 < quantity_on_hand <= reorder_level
+
+def previous_value(target, attr_name):
+    history = inspect(target).attrs[attr_name].history
+    return history.deleted[0] if history.deleted else getattr(target, attr_name)
+
+def bump(connection, column_name, delta):
+    if not delta:
+        return
+    column = DashboardCounters.__table__.c[column_name]
+    connection.execute(
+        update(DashboardCounters.__table__)
+        .where(DashboardCounters.__table__.c.id == COUNTERS_ROW_ID)
+        .values({column_name: column + delta})
+    )
+
+def counters_select():
+    return select(
+        select(func.count()).select_from(Supplier).scalar_subquery().label("total_suppliers"),
+        select(func.count()).select_from(Product).scalar_subquery().label("total_products"),
+        select(func.count()).select_from(Order).where(Order.status == "Pending").scalar_subquery().label("open_orders"),
+        select(func.count()).select_from(Inventory).where(
+            Inventory.quantity_on_hand <= Inventory.reorder_level,
+            Inventory.quantity_on_hand > 0
+        ).scalar_subquery().label("low_stock_count"),
+    )
+
+def refresh_dashboard_counters(connection):
+    """Recompute every counter from the source tables (back-fill and bulk writes)."""
+    counts = connection.execute(counters_select()).one()
+    connection.execute(
+        update(DashboardCounters.__table__)
+        .where(DashboardCounters.__table__.c.id == COUNTERS_ROW_ID)
+        .values(**counts._asdict())
+    )
+
+def get_dashboard_counters():
+    counters = db.session.get(DashboardCounters, COUNTERS_ROW_ID)
+    if counters is None:
+        # Table created without the back-fill migration (e.g. db.create_all); seed it once
+        counts = db.session.execute(counters_select()).one()
+        counters = DashboardCounters(id=COUNTERS_ROW_ID, **counts._asdict())
+        try:
+            db.session.add(counters)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback() # Seeded concurrently by another request
+            counters = db.session.get(DashboardCounters, COUNTERS_ROW_ID)
+    return counters
+
+
+# --- Incremental maintenance ---
+
+def keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+for attribute in (Order.status, Inventory.quantity_on_hand, Inventory.reorder_level):
+    # active_history loads the replaced value on assignment, so after_update can compute the delta
+    event.listen(attribute, "set", keep_previous_value, active_history=True)
+
+@event.listens_for(Supplier, "after_insert")
+def supplier_inserted(mapper, connection, target):
+    bump(connection, "total_suppliers", 1)
+
+@event.listens_for(Supplier, "after_delete")
+def supplier_deleted(mapper, connection, target):
+    bump(connection, "total_suppliers", -1)
+
+@event.listens_for(Product, "after_insert")
+def product_inserted(mapper, connection, target):
+    bump(connection, "total_products", 1)
+
+@event.listens_for(Product, "after_delete")
+def product_deleted(mapper, connection, target):
+    bump(connection, "total_products", -1)
+
+@event.listens_for(Order, "after_insert")
+def order_inserted(mapper, connection, target):
+    bump(connection, "open_orders", int(is_open_order(target.status)))
+
+@event.listens_for(Order, "after_update")
+def order_updated(mapper, connection, target):
+    was_open = is_open_order(previous_value(target, "status"))
+    bump(connection, "open_orders", int(is_open_order(target.status)) - int(was_open))
+
+@event.listens_for(Order, "after_delete")
+def order_deleted(mapper, connection, target):
+    bump(connection, "open_orders", -int(is_open_order(target.status)))
+
+@event.listens_for(Inventory, "after_insert")
+def inventory_inserted(mapper, connection, target):
+    bump(connection, "low_stock_count", int(is_low_stock(target.quantity_on_hand, target.reorder_level)))
+
+@event.listens_for(Inventory, "after_update")
+def inventory_updated(mapper, connection, target):
+    was_low = is_low_stock(previous_value(target, "quantity_on_hand"), previous_value(target, "reorder_level"))
+    bump(connection, "low_stock_count", int(is_low_stock(target.quantity_on_hand, target.reorder_level)) - int(was_low))
+
+@event.listens_for(Inventory, "after_delete")
+def inventory_deleted(mapper, connection, target):
+    bump(connection, "low_stock_count", -int(is_low_stock(target.quantity_on_hand, target.reorder_level)))
+
+# Execution options for a bulk write whose counter changes the caller applies itself with bump(),
+# e.g. checkout, which knows it adds one open order and which stock rows it moves. Bulk writes without
+# it fall back to the full recount below.
+COUNTERS_APPLIED = {"dashboard_counters_applied": True}
+
+def delete_product_inventory(product_id):
+    # Deletes a product's inventory record in one statement; RETURNING gives the levels the low-stock counter needs
+    removed = db.session.execute(
+        delete(Inventory).where(Inventory.product_id == product_id)
+        .returning(Inventory.quantity_on_hand, Inventory.reorder_level),
+        execution_options=COUNTERS_APPLIED,
+    ).all()
+    bump(db.session.connection(), "low_stock_count", -sum(int(is_low_stock(*row)) for row in removed))
+
+@event.listens_for(Session, "do_orm_execute")
+def refresh_after_bulk_write(orm_execute_state):
+    # Bulk insert/update/delete statements (Query.delete(), session.execute(insert(...), rows), ...)
+    # bypass the per-row events above
+    if not (orm_execute_state.is_insert or orm_execute_state.is_delete or orm_execute_state.is_update):
+        return None
+    if orm_execute_state.execution_options.get("dashboard_counters_applied"):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (Supplier, Product, Order, Inventory):
+        return None
+    result = orm_execute_state.invoke_statement()
+    refresh_dashboard_counters(orm_execute_state.session.connection())
+    return result
@@ -1,13 +1,23 @@
-from src.main import db
+from src.extensions import db
 from datetime import datetime
 
 class Inventory(db.Model):
+    __table_args__ = (
+        db.Index("ix_inventory_stock", "quantity_on_hand", "reorder_level"), # Low-stock filters compare these two columns
+        db.Index("ix_inventory_product_qty", "product_id", "quantity_on_hand"), # Covers the inventory value aggregate
+        # Partial index holding only the rows at/below reorder level, so the low-stock panels scan just those
+        db.Index("ix_inventory_low_stock", "product_id",
+                 sqlite_where=db.text("quantity_on_hand <= reorder_level"),
+                 postgresql_where=db.text("quantity_on_hand <= reorder_level")),
+        db.Index("ix_inventory_location_trgm", "location", postgresql_using="gin", postgresql_ops={"location": "gin_trgm_ops"}).ddl_if(dialect="postgresql"), # Inventory search; PostgreSQL only
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False, unique=True) # One-to-one with Product
     quantity_on_hand = db.Column(db.Integer, nullable=False, default=0)
     reorder_level = db.Column(db.Integer, default=10) # Changed from low_stock_threshold and added
     location = db.Column(db.String(100), nullable=True) # Added location
-    last_updated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow) # Naive UTC like Order.order_date; stamped on every INSERT/UPDATE, bulk ones included
 
     product = db.relationship("Product", backref=db.backref("inventory_record", uselist=False))
 
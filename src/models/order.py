@@ -1,20 +1,68 @@
-from src.main import db
+from src.extensions import db
+from sqlalchemy.types import SmallInteger, TypeDecorator
 from datetime import datetime
+from enum import IntEnum
 # Import OrderCategory to establish the relationship
 from .order_category import OrderCategory
 
+class OrderStatus(IntEnum):
+    PENDING = 1
+    PROCESSING = 2
+    SHIPPED = 3
+    DELIVERED = 4
+    CANCELLED = 5
+
+    @property
+    def label(self):
+        return self.name.capitalize()
+
+# Labels in workflow order, for forms and validation
+ORDER_STATUS_LABELS = tuple(status.label for status in OrderStatus)
+
+class OrderStatusType(TypeDecorator):
+    """Stores an order/item status as a small integer while the app keeps using the labels ("Pending", ...).
+
+    Filters such as Order.status == "Pending" bind to the integer code, so comparisons and the status
+    index work on integers instead of strings.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, OrderStatus):
+            return value
+        if isinstance(value, int) and not isinstance(value, bool): # A stored code
+            return OrderStatus(value).value # ValueError for unknown codes
+        if not isinstance(value, str):
+            raise ValueError(f"Unknown order status: {value!r}")
+        try:
+            return OrderStatus[value.upper()].value
+        except KeyError:
+            raise ValueError(f"Unknown order status: {value!r}")
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else OrderStatus(value).label
+
 class Order(db.Model):
+    __table_args__ = (
+        db.Index("ix_order_status", "status"),
+        db.Index("ix_order_user_date", "user_id", "order_date"), # A user's orders, newest first; also serves plain user_id lookups
+        # Trigram GIN indexes back the admin's substring (ILIKE '%term%') customer search; PostgreSQL only
+        db.Index("ix_order_customer_name_trgm", "customer_name", postgresql_using="gin", postgresql_ops={"customer_name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        db.Index("ix_order_customer_email_trgm", "customer_email", postgresql_using="gin", postgresql_ops={"customer_email": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False) # Assuming orders are placed by users
-    order_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    status = db.Column(db.String(50), nullable=False, default="Pending") # e.g., Pending, Processing, Shipped, Delivered, Cancelled
+    order_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True) # Date-range filters and newest-first listings
+    status = db.Column(OrderStatusType, nullable=False, default="Pending") # e.g., Pending, Processing, Shipped, Delivered, Cancelled
     total_amount = db.Column(db.Float, nullable=False, default=0.0)
     shipping_address = db.Column(db.String(200))
     customer_name = db.Column(db.String(100)) # Example if not linking to user or for guest checkouts
     customer_email = db.Column(db.String(120)) # Example
 
     # Foreign Key to OrderCategory
-    order_category_id = db.Column(db.Integer, db.ForeignKey("order_category.id"), nullable=True) # Allow orders without a category initially or make it False if category is mandatory
+    order_category_id = db.Column(db.Integer, db.ForeignKey("order_category.id"), nullable=True, index=True) # Allow orders without a category initially or make it False if category is mandatory
 
     # Relationship to OrderItem
     items = db.relationship("OrderItem", backref="order", lazy=True, cascade="all, delete-orphan")
@@ -24,18 +72,25 @@ class Order(db.Model):
     # Relationship to OrderCategory is defined by backref in OrderCategory model: category
 
     def __repr__(self):
-        return f"Order(\\\'{self.id}\\\'{self.order_category_id}\\\'{self.status}\\\'{self.placer.username if self.placer else 'N/A'}\\\'{self.category.name if self.category else 'N/A'}\\\'{self.total_amount}\\')"
+        # Only column attributes here: dereferencing placer/category would lazy-load on every log line
+        return f"Order(ID: {self.id}, Status: {self.status}, User ID: {self.user_id}, Category ID: {self.order_category_id}, Total: {self.total_amount})"
 
 class OrderItem(db.Model):
+    __table_args__ = (
+        # Leads with product_id for product lookups, and covers COUNT(DISTINCT order_id) per supplier's products
+        db.Index("ix_order_item_product_order", "product_id", "order_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price_at_purchase = db.Column(db.Float, nullable=False) # Store price at time of order
-    status = db.Column(db.String(50), nullable=False, default="Pending") # NEW FIELD: e.g., Pending, Processing, Shipped, Delivered, Cancelled
+    status = db.Column(OrderStatusType, nullable=False, default="Pending", server_default=str(OrderStatus.PENDING.value)) # NEW FIELD: e.g., Pending, Processing, Shipped, Delivered, Cancelled
 
     # Relationships to Product (to get product details)
-    product = db.relationship("Product", backref="order_items_assoc", lazy=True)
+    # raise_on_sql: callers must eager-load the product (selectinload/joinedload) instead of issuing one query per item
+    product = db.relationship("Product", backref="order_items_assoc", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"OrderItem(Order ID: {self.order_id}, Product ID: {self.product_id}, Qty: {self.quantity}, Status: {self.status})"
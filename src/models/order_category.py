@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-from src.main import db # Assuming db is initialized in main
+from src.extensions import db
 
 class OrderCategory(db.Model):
     __tablename__ = 'order_category'
@@ -13,8 +13,19 @@ class OrderCategory(db.Model):
     # Relationship to Orders
     # This will add an 'orders' attribute to OrderCategory instances
     # and a 'category' attribute to Order instances (due to backref)
-    orders = db.relationship('Order', backref='category', lazy='dynamic')
+    # raise_on_sql: a category can hold any number of orders, so load them with selectinload() or page through paginate_orders()
+    # passive_deletes: categories are only deleted once no orders reference them, so there's no collection to load and null out
+    orders = db.relationship('Order', backref='category', lazy='raise_on_sql', order_by='Order.order_date.desc()', passive_deletes=True)
+
+    def paginate_orders(self, page=1, per_page=20):
+        from .order import Order
+        return db.paginate(
+            db.select(Order).where(Order.order_category_id == self.id).order_by(Order.order_date.desc()),
+            page=page, per_page=per_page, error_out=False
+        )
 
     def __repr__(self):
         return f'<OrderCategory {self.id}: {self.name}>'
 
+# Names are unique regardless of case; also serves the lower(name) lookups and ON CONFLICT target in the product forms
+db.Index('uq_order_category_name_lower', db.func.lower(OrderCategory.name), unique=True)
@@ -1,12 +1,19 @@
-from src.main import db
+from src.extensions import db
 from datetime import datetime
 
 class Product(db.Model):
+    __table_args__ = (
+        db.Index("ix_product_supplier_name", "supplier_id", "name"), # Supplier-scoped listings, already in ORDER BY name order
+        # Trigram GIN indexes back the ILIKE '%term%' product/shop/inventory searches; PostgreSQL only
+        db.Index("ix_product_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        db.Index("ix_product_sku_trgm", "sku", postgresql_using="gin", postgresql_ops={"sku": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.Text)
     sku = db.Column(db.String(50), unique=True, nullable=False)
-    category = db.Column(db.String(50))
+    category = db.Column(db.String(50), index=True) # Shop category filter
     price = db.Column(db.Float, nullable=False)
     supplier_id = db.Column(db.Integer, db.ForeignKey("supplier.id"), nullable=False)
     date_added = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
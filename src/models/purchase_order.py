@@ -14,8 +14,8 @@ class PurchaseOrder(db.Model):
     expected_delivery = db.Column(db.Date)
 
     # Relationships
-    supplier = db.relationship("Supplier", back_populates="purchase_orders")
-    product = db.relationship("Product", back_populates="purchase_order_items")
+    supplier = db.relationship("Supplier", backref="purchase_orders")
+    product = db.relationship("Product", backref="purchase_order_items")
     shipments = db.relationship("Shipment", back_populates="purchase_order") # One PO might have multiple shipments
 
     def __repr__(self):
@@ -1,4 +1,4 @@
-from src.main import db
+from src.extensions import db
 from datetime import datetime
 
 class Supplier(db.Model):
@@ -11,7 +11,7 @@ class SupplierMessage(db.Model):
     category = db.Column(db.String(50)) # e.g., Order Inquiry, Performance Feedback
 
     # Relationship
-    supplier = db.relationship("Supplier", back_populates="messages")
+    supplier = db.relationship("Supplier", backref="messages")
 
     def __repr__(self):
         return f"<SupplierMessage {self.id} for Supplier {self.supplier_id}>"
@@ -25,7 +25,7 @@ class SupplierReview(db.Model):
     # Could add dimensions like delivery_timeliness_rating, quality_rating etc.
 
     # Relationship
-    supplier = db.relationship("Supplier", back_populates="reviews")
+    supplier = db.relationship("Supplier", backref="reviews")
 
     def __repr__(self):
         return f"<SupplierReview {self.id} for Supplier {self.supplier_id}>"
@@ -1,6 +1,20 @@
+from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime
-from src.main import db # Assuming db is initialized in main
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from werkzeug.security import check_password_hash
+from src.extensions import db, bcrypt, cache
+
+# With a shared cache (Redis/Memcached) the logged-in user is cached so the login loader skips its SELECT.
+# Only the columns below are cached, never password_hash, which loads from the database if something reads it.
+# Any ORM write to the row drops the entry at flush and again after commit, so a request that read the old row
+# meanwhile can't leave it cached; the short timeout bounds any remaining window.
+USER_CACHE_TIMEOUT = 60
+USER_CACHE_COLUMNS = ("id", "username", "email", "image_file", "role", "is_active", "date_created")
+
+def user_cache_key(user_id):
+    return f"user:{user_id}"
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -22,6 +36,24 @@ class User(db.Model, UserMixin):
     def __repr__(self):
         return f"User('{self.username}', '{self.email}', '{self.role}', Active: {self.is_active})"
 
+    # Passwords are hashed with bcrypt (cost from BCRYPT_LOG_ROUNDS); its C implementation releases the GIL,
+    # so concurrent logins run in parallel. Older werkzeug scrypt/pbkdf2 hashes, and bcrypt hashes made with
+    # a different cost, are still accepted and rehashed at the configured cost on the next successful check.
+    def set_password(self, password):
+        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+
+    def check_password(self, password):
+        if self.password_hash.startswith("$2"): # bcrypt ($2a$/$2b$/$2y$)
+            if not bcrypt.check_password_hash(self.password_hash, password):
+                return False
+            if int(self.password_hash.split("$")[2]) != current_app.config["BCRYPT_LOG_ROUNDS"]: # $2b$<cost>$...
+                self.set_password(password) # Caller commits
+            return True
+        if check_password_hash(self.password_hash, password):
+            self.set_password(password) # Caller commits
+            return True
+        return False
+
     # Helper properties for role checks (optional, but can make templates/routes cleaner)
     @property
     def is_admin(self):
@@ -35,3 +67,30 @@ class User(db.Model, UserMixin):
     def is_general_user(self):
         return self.role == "user"
 
+def cache_user(user):
+    cache.set(user_cache_key(user.id), {name: getattr(user, name) for name in USER_CACHE_COLUMNS}, timeout=USER_CACHE_TIMEOUT)
+
+def get_cached_user(user_id):
+    # A detached User rebuilt from the cached columns (attach it to the session), or None
+    fields = cache.get(user_cache_key(user_id))
+    if not isinstance(fields, dict):
+        return None
+    user = User(**fields)
+    make_transient_to_detached(user) # Persistent identity without a SELECT; other columns load on access
+    return user
+
+def invalidate_cached_user(mapper, connection, target):
+    cache.delete(user_cache_key(target.id))
+    object_session(target).info.setdefault("changed_user_ids", set()).add(target.id)
+
+for _event_name in ("after_update", "after_delete"):
+    event.listen(User, _event_name, invalidate_cached_user)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        cache.delete(user_cache_key(user_id))
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_users(session):
+    session.info.pop("changed_user_ids", None)
@@ -1,11 +1,13 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, g, current_app, Response, stream_with_context
 from flask_login import login_required
-from src.main import db
+from src.extensions import db, cache
 from src.models.supplier import Supplier
 from src.models.product import Product
 from src.models.inventory import Inventory
 from src.models.order import Order, OrderItem
-from sqlalchemy import func
+from src.models.dashboard_counters import get_dashboard_counters
+from src.dashboard_cache import register_dashboard_cache
+from sqlalchemy import func, select, case
 
 # Placeholder data - in a real app, this would come from database queries
 placeholder_overview_data = {
@@ -36,28 +38,61 @@ placeholder_turnover_data = {
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+# Dashboard aggregates are read on every dashboard load but change rarely, so they are cached
+# for a short TTL and dropped whenever one of the underlying tables is written.
+DASHBOARD_CACHE_TIMEOUT = 30
+DASHBOARD_CACHE_KEYS = ("dash_overview", "dash_order_fulfillment", "dash_inventory_turnover")
+
+@register_dashboard_cache
+def invalidate_dashboard_cache():
+    cache.delete_many(*DASHBOARD_CACHE_KEYS)
+
+def get_overview_counts():
+    # Memoized on flask.g so repeated use within one request doesn't re-read the counters
+    if "dash_overview" not in g:
+        # Maintained incrementally by mapper events, so this is a single primary-key lookup
+        g.dash_overview = get_dashboard_counters()
+    return g.dash_overview
+
+def get_fulfillment_counts():
+    if "dash_order_fulfillment" not in g:
+        stmt = select(
+            func.coalesce(func.sum(case((Order.status.in_(["Shipped", "Delivered", "Processing", "Pending"]), 1), else_=0)), 0).label("considered"),
+            func.coalesce(func.sum(case((Order.status == "Delivered", 1), else_=0)), 0).label("delivered"),
+        )
+        g.dash_order_fulfillment = db.session.execute(stmt).one()
+    return g.dash_order_fulfillment
+
+def get_inventory_value():
+    if "dash_inventory_turnover" not in g:
+        # Driven from inventory so the (product_id, quantity_on_hand) index covers the scan; no ORM rows are built
+        stmt = select(func.coalesce(func.sum(Product.price * Inventory.quantity_on_hand), 0.0)) \
+            .select_from(Inventory) \
+            .join(Product, Product.id == Inventory.product_id)
+        g.dash_inventory_turnover = db.session.execute(stmt).scalar_one()
+    return g.dash_inventory_turnover
+
 @api_bp.route("/dashboard/overview", methods=["GET"])
 @login_required
+@cache.cached(timeout=DASHBOARD_CACHE_TIMEOUT, key_prefix="dash_overview")
 def dashboard_overview():
-    total_suppliers = Supplier.query.count()
-    total_products = Product.query.count()
-    open_orders = Order.query.filter(Order.status == "Pending").count() # Assuming 'Pending' means open
-    # Using the same logic as in frontend_routes for low_stock_items_count
-    low_stock_items = Inventory.query.filter(Inventory.quantity_on_hand <= Inventory.low_stock_threshold, Inventory.quantity_on_hand > 0).count()
+    counts = get_overview_counts()
     
     overview_data = {
-        "total_suppliers": total_suppliers,
-        "total_products": total_products,
-        "open_orders": open_orders,
-        "low_stock_count": low_stock_items # Frontend expects low_stock_count
+        "total_suppliers": counts.total_suppliers,
+        "total_products": counts.total_products,
+        "open_orders": counts.open_orders,
+        "low_stock_count": counts.low_stock_count # Frontend expects low_stock_count
     }
     return jsonify(overview_data)
 
 @api_bp.route("/analytics/order_fulfillment", methods=["GET"])
 @login_required
+@cache.cached(timeout=DASHBOARD_CACHE_TIMEOUT, key_prefix="dash_order_fulfillment")
 def order_fulfillment_rate():
-    total_orders_considered = Order.query.filter(Order.status.in_(["Shipped", "Delivered", "Processing", "Pending"])).count()
-    delivered_orders = Order.query.filter(Order.status == "Delivered").count()
+    counts = get_fulfillment_counts()
+    total_orders_considered = counts.considered
+    delivered_orders = counts.delivered
     
     fulfillment_rate_percentage = (delivered_orders / total_orders_considered * 100) if total_orders_considered > 0 else 0
     
@@ -70,19 +105,42 @@ def order_fulfillment_rate():
 
 @api_bp.route("/analytics/inventory_turnover", methods=["GET"])
 @login_required
+@cache.cached(timeout=DASHBOARD_CACHE_TIMEOUT, key_prefix="dash_inventory_turnover")
 def inventory_turnover():
     # Simplified: Calculate total value of current inventory
     # A true turnover rate would require cost of goods sold (COGS) and average inventory over a period.
     # This provides a simple current inventory value instead, as requested by the frontend.
-    total_value = db.session.query(func.sum(Product.price * Inventory.quantity_on_hand)) \
-        .join(Inventory, Product.id == Inventory.product_id) \
-        .scalar()
+    total_value = get_inventory_value()
     
     inventory_value_data = {
-        "average_inventory_value_simple": round(total_value, 2) if total_value else 0
+        "average_inventory_value_simple": round(total_value, 2)
     }
     return jsonify(inventory_value_data)
 
+# Rows per fetch when streaming; bounds memory regardless of catalogue size
+STREAM_BATCH_SIZE = 1000
+
+@api_bp.route("/analytics/inventory_value/products", methods=["GET"])
+@login_required
+def inventory_value_by_product():
+    # One NDJSON line per product, written as rows arrive, so neither the worker nor the client
+    # has to hold the whole result; stream_results uses a server-side cursor where the driver has one
+    stmt = select(
+        Product.id.label("product_id"),
+        Product.name,
+        Product.sku,
+        Product.price,
+        Inventory.quantity_on_hand,
+        (Product.price * Inventory.quantity_on_hand).label("inventory_value"),
+    ).select_from(Inventory).join(Product, Product.id == Inventory.product_id).order_by(Product.id)
+
+    def generate():
+        result = db.session.execute(stmt, execution_options={"stream_results": True, "yield_per": STREAM_BATCH_SIZE})
+        for row in result.mappings():
+            yield current_app.json.dumps(dict(row)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
 # A simple health check endpoint for the API
 @api_bp.route("/health", methods=["GET"])
 def health_check():
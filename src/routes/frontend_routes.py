@@ -1,23 +1,31 @@
 import os
 import secrets
+import hashlib
 from PIL import Image # For resizing images
-from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, current_app, session
-from werkzeug.security import generate_password_hash, check_password_hash
-from src.main import db
+from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, current_app, session, g, jsonify, make_response
+from src.extensions import db, cache
 from src.models.user import User
 from src.models.supplier import Supplier
 from src.models.product import Product
 from src.models.inventory import Inventory
-from src.models.order import Order, OrderItem
+from src.models.order import Order, OrderItem, OrderStatus, ORDER_STATUS_LABELS
 from src.models.order_category import OrderCategory # Ensure this is imported
+from src.models.dashboard_counters import DashboardCounters, COUNTERS_ROW_ID, COUNTERS_APPLIED, get_dashboard_counters, bump, is_low_stock, \
+    delete_product_inventory
+from flask_wtf.csrf import generate_csrf
 from flask_login import login_user, current_user, logout_user, login_required
 from functools import wraps
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
+from sqlalchemy import or_, select, func, event, exists, literal, union_all, Date, inspect, update, delete, insert, bindparam
+from sqlalchemy.orm import joinedload, selectinload, raiseload, load_only
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import logging
-from datetime import datetime, timedelta # Added timedelta
+from datetime import datetime, timedelta, time # Added timedelta
 
 from .utils import save_profile_picture # Assuming utils.py contains save_profile_picture
+from src.dashboard_cache import register_dashboard_cache
+from src.cart_store import get_cart, save_cart, cart_size, add_cart_item, set_cart_item, remove_cart_item, clear_cart_items
 from src.forms import (
     RegistrationForm, LoginForm, 
     SupplierForm, ProductForm, 
@@ -31,29 +39,16 @@ frontend_bp = Blueprint("frontend", __name__)
 
 # Role-based access control decorator
 def role_required(role_name_or_list):
+    # Normalised once at decoration time; admin has access to everything this decorator is applied to
+    allowed_roles = frozenset([role_name_or_list] if isinstance(role_name_or_list, str) else role_name_or_list) | {"admin"}
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            # UserMixin.is_authenticated is is_active, so this also turns away deactivated accounts
             if not current_user.is_authenticated:
                 flash("Please log in to access this page.", "info")
                 return redirect(url_for("frontend.login", next=request.url))
-            if not current_user.is_active:
-                flash("Your account is not active. Please contact an administrator.", "warning")
-                logout_user()
-                return redirect(url_for("frontend.login"))
-            
-            allowed_roles = []
-            if isinstance(role_name_or_list, str):
-                allowed_roles.append(role_name_or_list)
-            elif isinstance(role_name_or_list, list):
-                allowed_roles = role_name_or_list
-            else: # Should not happen, but as a safeguard
-                allowed_roles = []
-
-            # Admin has access to everything this decorator is applied to, unless specifically denied in route
-            if current_user.is_admin:
-                return f(*args, **kwargs)
-            
             if current_user.role not in allowed_roles:
                 flash("You do not have permission to access this page.", "danger")
                 # Redirect to dashboard or a more appropriate page based on role
@@ -62,6 +57,161 @@ def role_required(role_name_or_list):
         return decorated_function
     return decorator
 
+# SelectField choice helpers. Each list is fetched at most once per request and shared via flask.g,
+# and with_entities() loads plain (id, name) rows instead of hydrating full ORM objects.
+# The cached lists are tuples so no caller can mutate the shared copy; sentinels are prepended per call.
+# Supplier and category lists change rarely, so they are also kept in the shared cache across requests;
+# writes drop them, and the timeout bounds staleness for workers that didn't see the write.
+REFERENCE_CHOICES_CACHE_TIMEOUT = 300
+
+def get_cached_choices(key, build):
+    if key not in g:
+        choices = cache.get(key)
+        if choices is None:
+            choices = build()
+            cache.set(key, choices, timeout=REFERENCE_CHOICES_CACHE_TIMEOUT)
+        setattr(g, key, choices)
+    return g.get(key)
+
+def build_order_category_choices():
+    rows = OrderCategory.query.with_entities(OrderCategory.id, OrderCategory.name).order_by(OrderCategory.name).all()
+    return tuple((row.id, row.name) for row in rows)
+
+def build_supplier_choices():
+    rows = Supplier.query.with_entities(Supplier.id, Supplier.name).order_by(Supplier.name).all()
+    return tuple((row.id, row.name) for row in rows)
+
+def get_order_category_choices():
+    return get_cached_choices("order_category_choices", build_order_category_choices)
+
+def get_order_category_name(category_id):
+    # Name of a category picked from the cached choices, or None; the product forms only store the name
+    if "order_category_names" not in g:
+        g.order_category_names = dict(get_order_category_choices())
+    return g.order_category_names.get(category_id)
+
+def get_product_category_choices():
+    return ((0, "Select a category or add new below"),) + get_order_category_choices()
+
+def get_supplier_choices():
+    return get_cached_choices("supplier_choices", build_supplier_choices)
+
+def invalidate_choices(key):
+    def listener(mapper, connection, target):
+        cache.delete(key)
+    return listener
+
+for _model, _key in ((OrderCategory, "order_category_choices"), (Supplier, "supplier_choices")):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, invalidate_choices(_key))
+
+def product_choices_cache_key(supplier_id):
+    return f"product_choices:{'all' if supplier_id is None else supplier_id}"
+
+def get_product_choices(supplier_id=None):
+    # Inventory form product dropdown, either every product or one supplier's
+    def build():
+        query = Product.query.with_entities(Product.id, Product.name, Product.sku)
+        if supplier_id is not None:
+            query = query.filter(Product.supplier_id == supplier_id)
+        return tuple((row.id, f"{row.name} (SKU: {row.sku})") for row in query.order_by(Product.name).all())
+    return get_cached_choices(product_choices_cache_key(supplier_id), build)
+
+def invalidate_product_choices(mapper, connection, target):
+    previous_supplier_ids = inspect(target).attrs.supplier_id.history.deleted or ()
+    for supplier_id in {None, target.supplier_id, *previous_supplier_ids}:
+        cache.delete(product_choices_cache_key(supplier_id))
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Product, _event_name, invalidate_product_choices)
+
+def populate_product_form_choices(form):
+    # Category and supplier dropdowns for ProductForm; a supplier only gets their own profile
+    form.product_category_id.choices = get_product_category_choices()
+    if current_user.is_admin:
+        form.supplier_id.choices = get_supplier_choices()
+    else:
+        supplier_profile = current_supplier_profile()
+        form.supplier_id.choices = [(supplier_profile.id, supplier_profile.name)] if supplier_profile else []
+
+# Dialects whose insert() supports ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+def get_or_create_order_category(name, description=None):
+    # Returns (category, created); category has .id and .name. Category names are unique on lower(name), so
+    # where the dialect has ON CONFLICT this is one INSERT ... DO NOTHING RETURNING, and the existing row
+    # is only read back when the name was already taken.
+    dialect_insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = (
+            dialect_insert(OrderCategory)
+            .values(name=name, description=description)
+            .on_conflict_do_nothing(index_elements=[func.lower(OrderCategory.name)])
+            .returning(OrderCategory.id, OrderCategory.name)
+        )
+        created = db.session.execute(stmt).first()
+        if created is not None:
+            cache.delete("order_category_choices") # Statement inserts skip the mapper events
+            return created, True
+    existing = db.session.execute(
+        select(OrderCategory.id, OrderCategory.name).where(func.lower(OrderCategory.name) == name.lower())
+    ).first()
+    if existing is not None:
+        return existing, False
+    category = OrderCategory(name=name, description=description)
+    db.session.add(category)
+    return category, True
+
+def find_unique_conflict(model, values, exclude_id=None):
+    # Name of the first unique field in `values` that another row already uses, or None.
+    # One indexed lookup before the write, so duplicates never abort the transaction.
+    columns = [getattr(model, name) for name in values]
+    stmt = select(*columns).where(or_(*(column == values[column.key] for column in columns))).limit(1)
+    if exclude_id is not None:
+        stmt = stmt.where(model.id != exclude_id)
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None
+    return next(name for name in values if row._mapping[name] == values[name])
+
+# Anonymous GETs of the login/register pages are identical apart from the CSRF token, so the rendered
+# HTML is cached with a placeholder in the token's place and the visitor's own token is substituted per request.
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 300
+CSRF_TOKEN_PLACEHOLDER = "__csrf_token__"
+
+def render_anonymous_form_page(template, form, **context):
+    # Flashed messages and query args make the page request-specific; render those normally
+    csrf_field = getattr(form, "csrf_token", None)
+    if csrf_field is None or request.args or session.get("_flashes"):
+        return render_template(template, form=form, **context)
+    cache_key = f"anonymous_page:{template}"
+    html = cache.get(cache_key)
+    if html is None:
+        csrf_field.current_token = CSRF_TOKEN_PLACEHOLDER
+        html = render_template(template, form=form, **context)
+        cache.set(cache_key, html, timeout=ANONYMOUS_PAGE_CACHE_TIMEOUT)
+    return html.replace(CSRF_TOKEN_PLACEHOLDER, generate_csrf())
+
+def render_revalidated_page(template, fingerprint, **context):
+    # GET pages whose content is cheap to fingerprint are served with an ETag and Cache-Control: no-cache, so the
+    # browser revalidates and a matching If-None-Match gets an empty 304 without rendering. The ETag also covers
+    # the session's CSRF token and a half-token-lifetime window, so a page reused from the browser cache always
+    # posts a token that is still valid. Pending flashes have to be rendered (and consumed), so those skip it.
+    if session.get("_flashes"):
+        return render_template(template, **context)
+    token_window = (current_app.config.get("WTF_CSRF_TIME_LIMIT") or 3600) // 2
+    etag = hashlib.sha1(repr((
+        template, fingerprint, current_user.get_id(), session.get("csrf_token"), int(datetime.now().timestamp()) // token_window,
+    )).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render_template(template, **context))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 @frontend_bp.route("/")
 @frontend_bp.route("/index")
 def index():
@@ -69,23 +219,46 @@ def index():
         return redirect(url_for("frontend.view_dashboard"))
     return redirect(url_for("frontend.login"))
 
+# Whether any account exists yet (the first one to register becomes admin). Only a True answer is cached:
+# it stays true for good, whereas a cached False in a worker that missed the first signup would hand out admin.
+HAS_ANY_USER_CACHE_KEY = "has_any_user"
+
+def has_any_user():
+    if cache.get(HAS_ANY_USER_CACHE_KEY):
+        return True
+    found = db.session.execute(select(exists().where(User.id.isnot(None)))).scalar() # Stops at the first row
+    if found:
+        cache.set(HAS_ANY_USER_CACHE_KEY, True, timeout=0)
+    return found
+
+def forget_has_any_user(mapper, connection, target):
+    cache.delete(HAS_ANY_USER_CACHE_KEY) # Re-checked on the next registration in case that was the last account
+
+event.listen(User, "after_delete", forget_has_any_user)
+
 @frontend_bp.route("/register", methods=["GET", "POST"])
 def register():
     if current_user.is_authenticated:
         return redirect(url_for("frontend.index"))
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = generate_password_hash(form.password.data)
-        
-        is_first_user = User.query.count() == 0 
+        conflict = find_unique_conflict(User, {"email": form.email.data, "username": form.username.data})
+        if conflict == "email":
+            flash("Email address already exists. Please use a different one.", "danger")
+            return render_template("register.html", title="Register", form=form)
+        if conflict == "username":
+            flash("Username already exists. Please choose a different one.", "danger")
+            return render_template("register.html", title="Register", form=form)
+
+        is_first_user = not has_any_user()
         user_role_to_set = "admin" if is_first_user else form.role.data
         user_is_active = True if is_first_user else False
         
         user = User(username=form.username.data, 
                     email=form.email.data, 
-                    password_hash=hashed_password, 
                     role=user_role_to_set,
                     is_active=user_is_active)
+        user.set_password(form.password.data)
         try:
             db.session.add(user)
             db.session.commit()
@@ -98,20 +271,17 @@ def register():
                 flash(flash_message, "info")
             return redirect(url_for("frontend.login"))
         except IntegrityError as ie:
-            db.session.rollback()
-            if "user.email" in str(ie.orig).lower() or "user_email_key" in str(ie.orig).lower():
-                 flash("Email address already exists. Please use a different one.", "danger")
-            elif "user.username" in str(ie.orig).lower() or "user_username_key" in str(ie.orig).lower():
-                 flash("Username already exists. Please choose a different one.", "danger")
-            else:
-                current_app.logger.error(f"IntegrityError during registration: {ie}")
-                flash("A registration error occurred. Please try a different username or email.", "danger")
+            db.session.rollback() # Only reached if a concurrent registration took the name/email after the check
+            current_app.logger.error(f"IntegrityError during registration: {ie}")
+            flash("A registration error occurred. Please try a different username or email.", "danger")
             return render_template("register.html", title="Register", form=form)
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Unexpected error during registration: {e}", exc_info=True)
             flash(f"An unexpected error occurred. Please try again.", "danger")
             return render_template("register.html", title="Register", form=form)
+    if request.method == "GET":
+        return render_anonymous_form_page("register.html", form, title="Register")
     return render_template("register.html", title="Register", form=form)
 
 @frontend_bp.route("/login", methods=["GET", "POST"])
@@ -121,7 +291,9 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user and check_password_hash(user.password_hash, form.password.data):
+        if user and user.check_password(form.password.data):
+            if db.session.is_modified(user): # Hash was upgraded to bcrypt at the configured cost
+                db.session.commit()
             if not user.is_active:
                 flash("Your account is not yet active. Please wait for admin approval or contact support.", "warning")
                 return redirect(url_for("frontend.login"))
@@ -131,6 +303,8 @@ def login():
             return redirect(next_page) if next_page else redirect(url_for("frontend.view_dashboard"))
         else:
             flash("Login Unsuccessful. Please check email and password", "danger")
+    if request.method == "GET":
+        return render_anonymous_form_page("login.html", form, title="Login")
     return render_template("login.html", title="Login", form=form)
 
 @frontend_bp.route("/logout")
@@ -140,14 +314,182 @@ def logout():
     flash("You have been logged out.", "info")
     return redirect(url_for("frontend.login"))
 
+# A supplier's profile is read on nearly every request they make, so besides the per-request copy on
+# flask.g the user -> supplier id mapping is kept in the shared cache (False meaning "no profile yet");
+# Supplier writes drop the entry. Only the id is cached: the row itself comes from the session, so a stale
+# copy can never be merged over fresh attributes and flushed back.
+SUPPLIER_PROFILE_CACHE_TIMEOUT = 60
+
+def supplier_profile_cache_key(user_id):
+    return f"supplier_profile_id:{user_id}"
+
+def current_supplier_profile():
+    # The logged-in supplier's profile, looked up once per request and shared via flask.g
+    if "supplier_profile" not in g:
+        supplier_profile = None
+        if current_user.is_supplier: # Only supplier accounts own a profile
+            cache_key = supplier_profile_cache_key(current_user.id)
+            supplier_id = cache.get(cache_key)
+            if supplier_id is None:
+                supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+                cache.set(cache_key, supplier_profile.id if supplier_profile else False, timeout=SUPPLIER_PROFILE_CACHE_TIMEOUT)
+            elif supplier_id is not False:
+                supplier_profile = db.session.get(Supplier, supplier_id) # Identity map first, else a primary-key read
+        g.supplier_profile = supplier_profile
+    return g.supplier_profile
+
+def invalidate_supplier_profile(mapper, connection, target):
+    previous_user_ids = inspect(target).attrs.user_id.history.deleted or ()
+    for user_id in {target.user_id, *previous_user_ids} - {None}:
+        cache.delete(supplier_profile_cache_key(user_id))
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Supplier, _event_name, invalidate_supplier_profile)
+
+def latest_order_options():
+    # The latest-orders table only shows these columns and no relationships, so load nothing else
+    # and raise on any other access instead of quietly adding a query per row
+    return (
+        load_only(Order.id, Order.status, Order.order_date, Order.total_amount, Order.customer_name, raiseload=True),
+        raiseload("*"),
+    )
+
+# Dashboard aggregates. They move on the minute scale, not per request, so each is memoized for a short
+# TTL and dropped whenever one of the tables it reads is written.
+DASHBOARD_AGGREGATES_TIMEOUT = 60
+
+@cache.memoize(timeout=DASHBOARD_AGGREGATES_TIMEOUT)
+def admin_low_stock():
+    low_stock_q = (
+        db.session.query(
+            Inventory.id.label("inventory_id"),
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.sku.label("sku"),
+            Inventory.quantity_on_hand.label("qoh"),
+            Inventory.reorder_level.label("reorder"),
+            Inventory.location.label("location"),
+            Supplier.name.label("supplier_name"),
+        )
+        .join(Product, Inventory.product_id == Product.id)
+        .outerjoin(Supplier, Product.supplier_id == Supplier.id)
+        .filter(Inventory.reorder_level.isnot(None))
+        .filter(Inventory.quantity_on_hand <= Inventory.reorder_level)
+        .order_by((Inventory.reorder_level - Inventory.quantity_on_hand).desc())
+        .limit(6)
+        .all()
+    )
+    return low_stock_q # Row objects: attribute access in the template, and they pickle for the memoize cache
+
+@cache.memoize(timeout=DASHBOARD_AGGREGATES_TIMEOUT)
+def supplier_low_stock(supplier_id):
+    low_stock_q = (
+        db.session.query(
+            Inventory.id.label("inventory_id"),
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.sku.label("sku"),
+            Inventory.quantity_on_hand.label("qoh"),
+            Inventory.reorder_level.label("reorder"),
+            Inventory.location.label("location"),
+        )
+        .join(Product, Inventory.product_id == Product.id)
+        .filter(Product.supplier_id == supplier_id)
+        .filter(Inventory.reorder_level.isnot(None))
+        .filter(Inventory.quantity_on_hand <= Inventory.reorder_level)
+        .order_by((Inventory.reorder_level - Inventory.quantity_on_hand).desc())
+        .limit(6)
+        .all()
+    )
+    return low_stock_q
+
+@cache.memoize(timeout=DASHBOARD_AGGREGATES_TIMEOUT)
+def admin_top_suppliers():
+    # Aggregate and rank by supplier_id alone in a CTE, so only the 5 winners are joined to Supplier
+    # for their names. ORDER BY refers to the units_sold label, so the SUM is evaluated once.
+    units_sold = func.sum(OrderItem.quantity).label("units_sold")
+    top = (
+        select(Product.supplier_id, units_sold, func.count(func.distinct(OrderItem.order_id)).label("orders_count"))
+        .select_from(OrderItem)
+        .join(Product, Product.id == OrderItem.product_id)
+        .group_by(Product.supplier_id)
+        .order_by(units_sold.desc())
+        .limit(5)
+        .cte("top_suppliers")
+    )
+    stmt = (
+        select(Supplier.id.label("supplier_id"), Supplier.name.label("supplier_name"), top.c.units_sold, top.c.orders_count)
+        .join(top, top.c.supplier_id == Supplier.id)
+        .order_by(top.c.units_sold.desc())
+    )
+    return db.session.execute(stmt).all()
+
+@cache.memoize(timeout=DASHBOARD_AGGREGATES_TIMEOUT)
+def admin_chart_data():
+    today = datetime.utcnow().date()
+    start_day = today - timedelta(days=6)
+
+    # Zero-fill in SQL: LEFT JOIN the per-day counts onto the 7 calendar days, so every day comes back
+    # in order with its count. The days are literal rows rather than generate_series(), which SQLite lacks.
+    days = union_all(*(
+        select(literal(start_day + timedelta(days=i), Date).label("d")) for i in range(7)
+    )).cte("days")
+    per_day = (
+        select(db.func.date(Order.order_date).label("d"), db.func.count(Order.id).label("c"))
+        .where(Order.order_date >= datetime.combine(start_day, time.min)) # Plain range, so ix_order_order_date applies
+        .group_by(db.func.date(Order.order_date))
+        .subquery()
+    )
+    trend_rows = db.session.execute(
+        select(days.c.d, db.func.coalesce(per_day.c.c, 0).label("c"))
+        .outerjoin(per_day, per_day.c.d == days.c.d)
+        .order_by(days.c.d)
+    ).all()
+
+    order_trend_labels = [row.d.strftime("%b %d") for row in trend_rows]
+    order_trend_data = [int(row.c) for row in trend_rows]
+
+    category_data = (
+        db.session.query(Product.category, db.func.count(Product.id))
+        .group_by(Product.category)
+        .all()
+    )
+    category_labels = [c[0] if c[0] else "Uncategorized" for c in category_data]
+    category_counts = [int(c[1]) for c in category_data]
+
+    return {
+        "order_trend": {"labels": order_trend_labels, "data": order_trend_data},
+        "category_distribution": {"labels": category_labels, "data": category_counts},
+    }
+
+@cache.memoize(timeout=DASHBOARD_AGGREGATES_TIMEOUT)
+def supplier_dashboard_stats(supplier_id):
+    # (product count, order count); both as scalar subqueries of a single SELECT
+    product_count = select(func.count()).select_from(Product) \
+        .where(Product.supplier_id == supplier_id).scalar_subquery()
+    order_count = select(func.count(func.distinct(OrderItem.order_id))) \
+        .join(Product, OrderItem.product_id == Product.id) \
+        .where(Product.supplier_id == supplier_id).scalar_subquery()
+    return tuple(db.session.execute(select(product_count, order_count)).one())
+
+@cache.memoize(timeout=DASHBOARD_AGGREGATES_TIMEOUT)
+def user_order_count(user_id):
+    return db.session.execute(
+        select(func.count()).select_from(Order).where(Order.user_id == user_id)
+    ).scalar_one()
+
+DASHBOARD_AGGREGATES = (
+    admin_low_stock, supplier_low_stock, admin_top_suppliers, admin_chart_data, supplier_dashboard_stats, user_order_count,
+)
+
+@register_dashboard_cache # Cleared after any committed write to the tables they read
+def invalidate_dashboard_aggregates():
+    for aggregate in DASHBOARD_AGGREGATES:
+        cache.delete_memoized(aggregate)
+
 @frontend_bp.route("/dashboard")
 @login_required
 def view_dashboard():
-    if not current_user.is_active:
-        flash("Your account is not active. Please contact an administrator.", "warning")
-        logout_user()
-        return redirect(url_for("frontend.login"))
-
     stats = {}
     low_stock = []
     latest_orders = []
@@ -158,86 +500,54 @@ def view_dashboard():
     # KPI STATS
     # -----------------------------
     if current_user.is_admin:
-        stats["total_users"] = User.query.count()
-        stats["total_products"] = Product.query.count()
-        stats["pending_orders"] = Order.query.filter_by(status="Pending").count()
+        # One round-trip: the user count rides along with the counters row, which already
+        # holds the product and pending-order totals
+        row = db.session.execute(
+            select(
+                select(func.count()).select_from(User).scalar_subquery().label("total_users"),
+                DashboardCounters.total_products,
+                DashboardCounters.open_orders,
+            ).where(DashboardCounters.id == COUNTERS_ROW_ID)
+        ).one_or_none()
+        if row is None: # Counters row not seeded yet
+            counters = get_dashboard_counters()
+            row = (db.session.execute(select(func.count()).select_from(User)).scalar_one(), counters.total_products, counters.open_orders)
+        stats["total_users"], stats["total_products"], stats["pending_orders"] = row
 
     elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
-            stats["supplier_products"] = Product.query.filter_by(supplier_id=supplier_profile.id).count()
-            stats["supplier_orders"] = (
-                Order.query.join(OrderItem).join(Product)
-                .filter(Product.supplier_id == supplier_profile.id)
-                .distinct()
-                .count()
-            )
+            stats["supplier_products"], stats["supplier_orders"] = supplier_dashboard_stats(supplier_profile.id)
         else:
             stats["supplier_products"] = 0
             stats["supplier_orders"] = 0
 
     elif current_user.is_general_user:
-        stats["user_orders"] = Order.query.filter_by(user_id=current_user.id).count()
+        stats["user_orders"] = user_order_count(current_user.id)
 
     # -----------------------------
     # LOW STOCK (Admin + Supplier)
     # -----------------------------
     if current_user.is_admin:
-        low_stock_q = (
-            db.session.query(
-                Inventory.id.label("inventory_id"),
-                Product.id.label("product_id"),
-                Product.name.label("product_name"),
-                Product.sku.label("sku"),
-                Inventory.quantity_on_hand.label("qoh"),
-                Inventory.reorder_level.label("reorder"),
-                Inventory.location.label("location"),
-                Supplier.name.label("supplier_name"),
-            )
-            .join(Product, Inventory.product_id == Product.id)
-            .outerjoin(Supplier, Product.supplier_id == Supplier.id)
-            .filter(Inventory.reorder_level.isnot(None))
-            .filter(Inventory.quantity_on_hand <= Inventory.reorder_level)
-            .order_by((Inventory.reorder_level - Inventory.quantity_on_hand).desc())
-            .limit(6)
-            .all()
-        )
-        low_stock = [dict(r._mapping) for r in low_stock_q]
+        low_stock = admin_low_stock()
 
     elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
-            low_stock_q = (
-                db.session.query(
-                    Inventory.id.label("inventory_id"),
-                    Product.id.label("product_id"),
-                    Product.name.label("product_name"),
-                    Product.sku.label("sku"),
-                    Inventory.quantity_on_hand.label("qoh"),
-                    Inventory.reorder_level.label("reorder"),
-                    Inventory.location.label("location"),
-                )
-                .join(Product, Inventory.product_id == Product.id)
-                .filter(Product.supplier_id == supplier_profile.id)
-                .filter(Inventory.reorder_level.isnot(None))
-                .filter(Inventory.quantity_on_hand <= Inventory.reorder_level)
-                .order_by((Inventory.reorder_level - Inventory.quantity_on_hand).desc())
-                .limit(6)
-                .all()
-            )
-            low_stock = [dict(r._mapping) for r in low_stock_q]
+            low_stock = supplier_low_stock(supplier_profile.id)
 
     # -----------------------------
     # LATEST ORDERS (role-aware)
     # -----------------------------
     if current_user.is_admin:
-        latest_orders = Order.query.order_by(Order.order_date.desc()).limit(8).all()
+        latest_orders = Order.query.options(*latest_order_options()).order_by(Order.order_date.desc()).limit(8).all()
 
     elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
             latest_orders = (
-                Order.query.join(OrderItem).join(Product)
+                Order.query.options(*latest_order_options())
+                .join(OrderItem).join(Product)
                 .filter(Product.supplier_id == supplier_profile.id)
                 .distinct()
                 .order_by(Order.order_date.desc())
@@ -247,66 +557,19 @@ def view_dashboard():
 
     elif current_user.is_general_user:
         latest_orders = (
-            Order.query.filter_by(user_id=current_user.id)
+            Order.query.options(*latest_order_options())
+            .filter_by(user_id=current_user.id)
             .order_by(Order.order_date.desc())
             .limit(8)
             .all()
         )
 
     # -----------------------------
-    # ADMIN: TOP SUPPLIERS
+    # ADMIN: TOP SUPPLIERS + CHARTS
     # -----------------------------
     if current_user.is_admin:
-        top_suppliers_q = (
-            db.session.query(
-                Supplier.id.label("supplier_id"),
-                Supplier.name.label("supplier_name"),
-                db.func.coalesce(db.func.sum(OrderItem.quantity), 0).label("units_sold"),
-                db.func.count(db.func.distinct(Order.id)).label("orders_count"),
-            )
-            .join(Product, Product.supplier_id == Supplier.id)
-            .join(OrderItem, OrderItem.product_id == Product.id)
-            .join(Order, Order.id == OrderItem.order_id)
-            .group_by(Supplier.id, Supplier.name)
-            .order_by(db.func.coalesce(db.func.sum(OrderItem.quantity), 0).desc())
-            .limit(5)
-            .all()
-        )
-        top_suppliers = [dict(r._mapping) for r in top_suppliers_q]
-
-    # -----------------------------
-    # CHARTS (Admin only) - efficient
-    # -----------------------------
-    if current_user.is_admin:
-        today = datetime.utcnow().date()
-        start_day = today - timedelta(days=6)
-
-        per_day = (
-            db.session.query(
-                db.func.date(Order.order_date).label("d"),
-                db.func.count(Order.id).label("c"),
-            )
-            .filter(db.func.date(Order.order_date) >= start_day)
-            .group_by(db.func.date(Order.order_date))
-            .all()
-        )
-        per_day_map = {row.d: row.c for row in per_day}
-
-        order_trend_labels = [(start_day + timedelta(days=i)).strftime("%b %d") for i in range(7)]
-        order_trend_data = [int(per_day_map.get(start_day + timedelta(days=i), 0)) for i in range(7)]
-
-        category_data = (
-            db.session.query(Product.category, db.func.count(Product.id))
-            .group_by(Product.category)
-            .all()
-        )
-        category_labels = [c[0] if c[0] else "Uncategorized" for c in category_data]
-        category_counts = [int(c[1]) for c in category_data]
-
-        chart_data = {
-            "order_trend": {"labels": order_trend_labels, "data": order_trend_data},
-            "category_distribution": {"labels": category_labels, "data": category_counts},
-        }
+        top_suppliers = admin_top_suppliers()
+        chart_data = admin_chart_data()
 
     return render_template(
         "dashboard.html",
@@ -321,8 +584,9 @@ def view_dashboard():
 @frontend_bp.route("/admin/users")
 @role_required("admin")
 def manage_users():
-    users = User.query.order_by(User.date_created.desc()).all()
-    return render_template("admin_users.html", title="Manage Users", users=users)
+    page = request.args.get("page", 1, type=int)
+    users_pagination = User.query.order_by(User.date_created.desc()).paginate(page=page, per_page=50)
+    return render_template("admin_users.html", title="Manage Users", users_pagination=users_pagination)
 
 @frontend_bp.route("/admin/user/activate/<int:user_id>", methods=["POST"])
 @role_required("admin")
@@ -369,13 +633,8 @@ def set_user_role(user_id, new_role):
 @frontend_bp.route("/suppliers")
 @login_required 
 def view_suppliers():
-    if not current_user.is_active:
-        flash("Your account is not active. Please contact an administrator.", "warning")
-        logout_user()
-        return redirect(url_for("frontend.login"))
-
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
             return redirect(url_for("frontend.edit_supplier", supplier_id=supplier_profile.id))
         else:
@@ -393,12 +652,15 @@ def view_suppliers():
 def add_supplier():
     form = SupplierForm()
     if current_user.is_supplier:
-        existing_supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        existing_supplier_profile = current_supplier_profile()
         if existing_supplier_profile:
             flash("You already have a supplier profile. You can edit it.", "info")
             return redirect(url_for("frontend.edit_supplier", supplier_id=existing_supplier_profile.id))
 
     if form.validate_on_submit():
+        if find_unique_conflict(Supplier, {"name": form.name.data, "email": form.email.data}):
+            flash("Supplier email or name already exists.", "danger")
+            return render_template("supplier_form.html", title="Create Supplier Profile", form=form, legend="New Supplier Profile")
         try:
             supplier = Supplier(
                 name=form.name.data,
@@ -412,6 +674,8 @@ def add_supplier():
             
             db.session.add(supplier)
             db.session.commit()
+            if current_user.is_supplier:
+                g.supplier_profile = supplier # Replace the cached "no profile yet" lookup
             flash("Supplier profile created successfully!", "success")
             if current_user.is_supplier:
                 return redirect(url_for("frontend.edit_supplier", supplier_id=supplier.id))
@@ -434,6 +698,9 @@ def edit_supplier(supplier_id):
         abort(403)
     form = SupplierForm(obj=supplier)
     if form.validate_on_submit():
+        if find_unique_conflict(Supplier, {"name": form.name.data, "email": form.email.data}, exclude_id=supplier.id):
+            flash("Supplier email or name already exists for another record.", "danger")
+            return render_template("supplier_form.html", title="Edit Supplier Profile", form=form, legend=f"Edit Supplier: {supplier.name}")
         try:
             form.populate_obj(supplier)
             db.session.commit()
@@ -459,7 +726,7 @@ def delete_supplier(supplier_id):
         abort(403)
     try:
         # Check if supplier is associated with any products
-        if Product.query.filter_by(supplier_id=supplier.id).first():
+        if db.session.execute(select(exists().where(Product.supplier_id == supplier.id))).scalar():
              flash(f"Cannot delete supplier \'{supplier.name}\'. It is associated with products. Reassign or delete products first.", "danger")
              return redirect(url_for("frontend.view_suppliers"))
         
@@ -480,11 +747,6 @@ def delete_supplier(supplier_id):
 @frontend_bp.route("/products")
 @login_required 
 def view_products():
-    if not current_user.is_active:
-        flash("Your account is not active. Please contact an administrator.", "warning")
-        logout_user()
-        return redirect(url_for("frontend.login"))
-    
     # General users are redirected to shop, they don\'t manage products here
     if current_user.is_general_user:
         flash("Access denied. Please browse products in the shop.", "info")
@@ -493,10 +755,11 @@ def view_products():
     page = request.args.get("page", 1, type=int)
     search_term = request.args.get("search", "")
     query = Product.query
+    supplier_profile = None
 
     # If the current user is a supplier, filter products by their supplier_id
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
             query = query.filter(Product.supplier_id == supplier_profile.id)
         else:
@@ -505,31 +768,31 @@ def view_products():
             flash("You need to set up your supplier profile to view or manage your products.", "info")
             # Optionally redirect to add_supplier or dashboard
             # return redirect(url_for("frontend.add_supplier")) 
+    else:
+        # The page shows each row's supplier name; a supplier's own rows all point at the profile already in the session
+        query = query.options(joinedload(Product.supplier))
     
     if search_term:
         query = query.filter(Product.name.ilike(f"%{search_term}%"))
         
     products_pagination = query.order_by(Product.name).paginate(page=page, per_page=10)
-    return render_template("products.html", title="Manage Products", products_pagination=products_pagination, search_term=search_term)
+    return render_template("products.html", title="Manage Products", products_pagination=products_pagination, search_term=search_term,
+                           supplier_profile=supplier_profile)
 
 @frontend_bp.route("/product/add", methods=["GET", "POST"])
 @role_required(["admin", "supplier"])
 def add_product():
     form = ProductForm()
-    categories = OrderCategory.query.order_by(OrderCategory.name).all()
-    form.product_category_id.choices = [(oc.id, oc.name) for oc in categories]
-    form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
+    populate_product_form_choices(form)
 
     if current_user.is_admin:
-        form.supplier_id.choices = [(s.id, s.name) for s in Supplier.query.order_by(Supplier.name).all()]
         if not form.supplier_id.choices and request.method == "GET":
              flash("No suppliers available. Please add a supplier first.", "info")
     elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if not supplier_profile:
             flash("You must have a supplier profile to add products.", "danger")
             return redirect(url_for("frontend.add_supplier"))
-        form.supplier_id.choices = [(supplier_profile.id, supplier_profile.name)]
         if request.method == "GET": # Pre-select supplier for supplier user
             form.supplier_id.data = supplier_profile.id # Set default value for the field
 
@@ -537,102 +800,61 @@ def add_product():
         try:
             # Ensure supplier isn\'t trying to assign product to another supplier
             if current_user.is_supplier:
-                supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+                supplier_profile = current_supplier_profile()
                 if not supplier_profile or form.supplier_id.data != supplier_profile.id:
                     flash("Invalid supplier ID for your role.", "danger")
-                    # Repopulate choices before rendering template again
-                    form.product_category_id.choices = [(oc.id, oc.name) for oc in OrderCategory.query.order_by(OrderCategory.name).all()]
-                    form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
-                    form.supplier_id.choices = [(supplier_profile.id, supplier_profile.name)] if supplier_profile else []
                     return render_template("product_form.html", title="Add Product", form=form, legend="New Product")
             
-            category_to_assign = None
-            new_category_created_this_request = False # Flag to avoid double commit issues
+            conflict = find_unique_conflict(Product, {"sku": form.sku.data, "name": form.name.data})
+            if conflict:
+                flash("Product SKU already exists." if conflict == "sku" else "Product name already exists.", "danger")
+                return render_template("product_form.html", title="Add Product", form=form, legend="New Product")
+
+            category_name = None
             if form.new_category_name.data:
                 new_cat_name = form.new_category_name.data.strip()
-                existing_category = OrderCategory.query.filter(OrderCategory.name.ilike(new_cat_name)).first()
-                if existing_category:
-                    category_to_assign = existing_category
-                    flash(f"Using existing category: \'{new_cat_name}\'.", "info")
-                else:
-                    new_cat_desc = form.new_category_description.data.strip() if form.new_category_description.data else None
-                    category_to_assign = OrderCategory(name=new_cat_name, description=new_cat_desc)
-                    db.session.add(category_to_assign)
-                    new_category_created_this_request = True # Mark that we added it
+                new_cat_desc = form.new_category_description.data.strip() if form.new_category_description.data else None
+                category_to_assign, created = get_or_create_order_category(new_cat_name, new_cat_desc)
+                category_name = category_to_assign.name
+                if created:
                     flash(f"New category \'{new_cat_name}\' will be created.", "info")
+                else:
+                    flash(f"Using existing category: \'{category_name}\'.", "info")
             elif form.product_category_id.data and form.product_category_id.data != 0:
-                category_to_assign = OrderCategory.query.get(form.product_category_id.data)
-                if not category_to_assign:
+                category_name = get_order_category_name(form.product_category_id.data)
+                if not category_name:
                     flash("Selected product category not found.", "danger")
-                    # Repopulate choices before rendering template
-                    form.product_category_id.choices = [(oc.id, oc.name) for oc in OrderCategory.query.order_by(OrderCategory.name).all()]
-                    form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
-                    if current_user.is_admin: form.supplier_id.choices = [(s.id, s.name) for s in Supplier.query.order_by(Supplier.name).all()]
-                    elif current_user.is_supplier: 
-                        sp = Supplier.query.filter_by(user_id=current_user.id).first()
-                        form.supplier_id.choices = [(sp.id, sp.name)] if sp else []
                     return render_template("product_form.html", title="Add Product", form=form, legend="New Product")
             else:
                 flash("Please select an existing category or provide a name for a new category.", "danger")
-                # Repopulate choices before rendering template
-                form.product_category_id.choices = [(oc.id, oc.name) for oc in OrderCategory.query.order_by(OrderCategory.name).all()]
-                form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
-                if current_user.is_admin: form.supplier_id.choices = [(s.id, s.name) for s in Supplier.query.order_by(Supplier.name).all()]
-                elif current_user.is_supplier: 
-                    sp = Supplier.query.filter_by(user_id=current_user.id).first()
-                    form.supplier_id.choices = [(sp.id, sp.name)] if sp else []
                 return render_template("product_form.html", title="Add Product", form=form, legend="New Product")
 
             product = Product(
                 name=form.name.data,
                 sku=form.sku.data,
                 description=form.description.data,
-                category=category_to_assign.name if category_to_assign else None, # Assign category name string
+                category=category_name, # Assign category name string
                 price=form.price.data,
                 supplier_id=form.supplier_id.data
             )
             db.session.add(product)
-            
-            # If a new category was defined and added to session, commit it now with the product
-            if new_category_created_this_request: # Commit here if new category was added
-                db.session.commit()
-            else: # Otherwise, commit only the product (or product + existing category link)
-                db.session.commit()
+            db.session.flush() # Assigns product.id without committing
 
             # Create an initial inventory record for the new product
             initial_inventory = Inventory(product_id=product.id, quantity_on_hand=0, reorder_level=10, location="Default") # Default qty 0
             db.session.add(initial_inventory)
-            db.session.commit()
+            db.session.commit() # Category (if new), product and inventory in one transaction
 
             flash("Product added successfully! An initial inventory record has been created with 0 stock. Please adjust stock as needed.", "success")
             return redirect(url_for("frontend.view_products"))
         except IntegrityError as ie:
             db.session.rollback()
             current_app.logger.error(f"Integrity error adding product: {ie}")
-            if "product_sku_key" in str(ie.orig).lower() or "product.sku" in str(ie.orig).lower():
-                 flash("Product SKU already exists.", "danger")
-            elif "product_name_key" in str(ie.orig).lower() or "product.name" in str(ie.orig).lower(): 
-                 flash("Product name already exists.", "danger")
-            else:
-                 flash("A database integrity error occurred. This could be a duplicate SKU or product name.", "danger")
+            flash("A database integrity error occurred. This could be a duplicate SKU or product name.", "danger")
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error adding product: {e}", exc_info=True)
             flash(f"An error occurred while adding the product: {str(e)}", "danger")
-    
-    # Repopulate choices if form validation fails or it\s a GET request
-    if request.method == "GET" or (form.is_submitted() and not form.validate()):
-        form.product_category_id.choices = [(oc.id, oc.name) for oc in OrderCategory.query.order_by(OrderCategory.name).all()]
-        form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
-        if current_user.is_admin:
-            form.supplier_id.choices = [(s.id, s.name) for s in Supplier.query.order_by(Supplier.name).all()]
-        elif current_user.is_supplier:
-            supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
-            if supplier_profile:
-                form.supplier_id.choices = [(supplier_profile.id, supplier_profile.name)]
-                form.supplier_id.data = supplier_profile.id # Ensure it is pre-selected
-            else: # Should not happen if add_product check is in place
-                form.supplier_id.choices = []
 
     return render_template("product_form.html", title="Add Product", form=form, legend="New Product")
 
@@ -644,7 +866,7 @@ def edit_product(product_id):
     if current_user.is_admin:
         allowed_to_edit = True
     elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile and product.supplier_id == supplier_profile.id:
             allowed_to_edit = True
     
@@ -653,28 +875,22 @@ def edit_product(product_id):
         abort(403)
 
     form = ProductForm(obj=product)
-    # Populate choices for categories and suppliers
-    form.product_category_id.choices = [(oc.id, oc.name) for oc in OrderCategory.query.order_by(OrderCategory.name).all()]
-    form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
-    if current_user.is_admin:
-        form.supplier_id.choices = [(s.id, s.name) for s in Supplier.query.order_by(Supplier.name).all()]
-    elif current_user.is_supplier:
+    populate_product_form_choices(form)
+    if current_user.is_supplier:
         # Supplier can only see their own supplier ID and it should be disabled
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
-        if supplier_profile:
-            form.supplier_id.choices = [(supplier_profile.id, supplier_profile.name)]
-            form.supplier_id.render_kw = {"disabled": True} # Disable supplier field for suppliers
-        else: # Should not happen if checks are in place
+        if not current_supplier_profile(): # Should not happen if checks are in place
             flash("Supplier profile not found. Cannot edit product.", "danger")
             return redirect(url_for("frontend.view_products"))
+        form.supplier_id.render_kw = {"disabled": True} # Disable supplier field for suppliers
 
     if request.method == "GET":
         # Pre-fill form data from product object
         form.supplier_id.data = product.supplier_id
         if product.category: # Product.category is a string name
-            category_obj = OrderCategory.query.filter_by(name=product.category).first()
-            if category_obj:
-                form.product_category_id.data = category_obj.id
+            # Resolved from the category choices already loaded above, not with another query
+            category_id = next((choice_id for choice_id, name in get_order_category_choices() if name == product.category), None)
+            if category_id:
+                form.product_category_id.data = category_id
             else:
                 # If category string exists but no object, suggest creating it
                 flash(f"Product has category \'{product.category}\' which is not in the OrderCategory table. You can create it or select another.", "warning")
@@ -682,65 +898,41 @@ def edit_product(product_id):
 
     if form.validate_on_submit():
         try:
-            category_to_assign = None
-            new_category_created_this_request = False
+            conflict = find_unique_conflict(Product, {"sku": form.sku.data, "name": form.name.data}, exclude_id=product.id)
+            if conflict:
+                flash("Product SKU already exists for another product." if conflict == "sku" else "Product name already exists for another product.", "danger")
+                return render_template("product_form.html", title=f"Edit Product: {product.name}", form=form, legend=f"Edit Product: {product.name}")
+
+            category_name = None
             if form.new_category_name.data:
                 new_cat_name = form.new_category_name.data.strip()
-                existing_category = OrderCategory.query.filter(OrderCategory.name.ilike(new_cat_name)).first()
-                if existing_category:
-                    category_to_assign = existing_category
-                else:
-                    new_cat_desc = form.new_category_description.data.strip() if form.new_category_description.data else None
-                    category_to_assign = OrderCategory(name=new_cat_name, description=new_cat_desc)
-                    db.session.add(category_to_assign)
-                    new_category_created_this_request = True
+                new_cat_desc = form.new_category_description.data.strip() if form.new_category_description.data else None
+                category_name = get_or_create_order_category(new_cat_name, new_cat_desc)[0].name
             elif form.product_category_id.data and form.product_category_id.data != 0:
-                category_to_assign = OrderCategory.query.get(form.product_category_id.data)
+                category_name = get_order_category_name(form.product_category_id.data)
             
             # Populate product object from form
             product.name = form.name.data
             product.sku = form.sku.data
             product.description = form.description.data
-            product.category = category_to_assign.name if category_to_assign else product.category # Keep old if none selected/created
+            product.category = category_name or product.category # Keep old if none selected/created
             product.price = form.price.data
             # Supplier cannot change supplier_id of existing product via this form
             if current_user.is_admin:
                 product.supplier_id = form.supplier_id.data
 
-            if new_category_created_this_request:
-                db.session.commit() # Commit new category first
-            db.session.commit() # Commit product changes
+            db.session.commit() # New category (if any) and product changes together
 
             flash("Product updated successfully!", "success")
             return redirect(url_for("frontend.view_products"))
         except IntegrityError as ie:
             db.session.rollback()
             current_app.logger.error(f"Integrity error updating product: {ie}")
-            if "product_sku_key" in str(ie.orig).lower() or "product.sku" in str(ie.orig).lower():
-                 flash("Product SKU already exists for another product.", "danger")
-            elif "product_name_key" in str(ie.orig).lower() or "product.name" in str(ie.orig).lower(): 
-                 flash("Product name already exists for another product.", "danger")
-            else:
-                 flash("A database integrity error occurred. This could be a duplicate SKU or product name.", "danger")
+            flash("A database integrity error occurred. This could be a duplicate SKU or product name.", "danger")
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error updating product: {e}", exc_info=True)
             flash(f"An error occurred while updating the product: {str(e)}", "danger")
-    
-    # Repopulate choices if form validation fails or it\s a GET request
-    if request.method == "GET" or (form.is_submitted() and not form.validate()):
-        form.product_category_id.choices = [(oc.id, oc.name) for oc in OrderCategory.query.order_by(OrderCategory.name).all()]
-        form.product_category_id.choices.insert(0, (0, "Select a category or add new below"))
-        if current_user.is_admin:
-            form.supplier_id.choices = [(s.id, s.name) for s in Supplier.query.order_by(Supplier.name).all()]
-        elif current_user.is_supplier:
-            supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
-            if supplier_profile:
-                form.supplier_id.choices = [(supplier_profile.id, supplier_profile.name)]
-                form.supplier_id.data = supplier_profile.id # Ensure it is pre-selected
-                form.supplier_id.render_kw = {"disabled": True}
-            else:
-                form.supplier_id.choices = []
 
     return render_template("product_form.html", title=f"Edit Product: {product.name}", form=form, legend=f"Edit Product: {product.name}")
 
@@ -752,7 +944,7 @@ def delete_product(product_id):
     if current_user.is_admin:
         allowed_to_delete = True
     elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile and product.supplier_id == supplier_profile.id:
             allowed_to_delete = True
     
@@ -761,12 +953,12 @@ def delete_product(product_id):
         abort(403)
     try:
         # Check if product is in any orders
-        if OrderItem.query.filter_by(product_id=product.id).first():
+        if db.session.execute(select(exists().where(OrderItem.product_id == product.id))).scalar():
             flash(f"Cannot delete product \'{product.name}\\' as it is part of existing orders. Consider deactivating it instead.", "danger")
             return redirect(url_for("frontend.view_products"))
         
-        # Delete associated inventory records first
-        Inventory.query.filter_by(product_id=product.id).delete()
+        # Delete associated inventory records first; a single DELETE, nothing loaded into the session
+        delete_product_inventory(product.id)
         # Then delete the product
         db.session.delete(product)
         db.session.commit()
@@ -786,7 +978,7 @@ def view_inventory():
     query = Inventory.query.join(Product) # Join with Product to allow searching by product name
 
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
             query = query.filter(Product.supplier_id == supplier_profile.id)
         else:
@@ -808,16 +1000,16 @@ def view_inventory():
 def add_inventory_item():
     form = AddInventoryItemForm()
     # Populate product choices, filtered by supplier if current user is a supplier
-    product_query = Product.query
+    supplier_id_filter = None
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
-            product_query = product_query.filter(Product.supplier_id == supplier_profile.id)
+            supplier_id_filter = supplier_profile.id
         else:
             flash("Supplier profile not found. Cannot add inventory.", "danger")
             return redirect(url_for("frontend.view_inventory"))
     
-    form.product_id.choices = [(p.id, f"{p.name} (SKU: {p.sku})") for p in product_query.order_by(Product.name).all()]
+    form.product_id.choices = get_product_choices(supplier_id_filter)
     if not form.product_id.choices:
         flash("No products available to add to inventory. Please add products first.", "info")
         # Optionally redirect to add_product if no products for this supplier
@@ -825,12 +1017,7 @@ def add_inventory_item():
 
     if form.validate_on_submit():
         try:
-            # Check if inventory for this product already exists
-            existing_inventory = Inventory.query.filter_by(product_id=form.product_id.data).first()
-            if existing_inventory:
-                flash("Inventory record for this product already exists. Please edit the existing record.", "warning")
-                return redirect(url_for("frontend.edit_inventory_item", inventory_id=existing_inventory.id))
-
+            # No pre-check: inventory.product_id is unique, so a duplicate surfaces as an IntegrityError below
             inventory_item = Inventory(
                 product_id=form.product_id.data,
                 quantity_on_hand=form.quantity_on_hand.data,
@@ -843,7 +1030,11 @@ def add_inventory_item():
             return redirect(url_for("frontend.view_inventory"))
         except IntegrityError:
             db.session.rollback()
-            flash("Error: Could not add inventory item due to a database conflict (e.g., product already has inventory).", "danger")
+            existing_inventory_id = db.session.execute(select(Inventory.id).where(Inventory.product_id == form.product_id.data)).scalar()
+            if existing_inventory_id:
+                flash("Inventory record for this product already exists. Please edit the existing record.", "warning")
+                return redirect(url_for("frontend.edit_inventory_item", inventory_id=existing_inventory_id))
+            flash("Error: Could not add inventory item due to a database conflict.", "danger")
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error adding inventory item: {e}")
@@ -853,12 +1044,12 @@ def add_inventory_item():
 @frontend_bp.route("/inventory/edit/<int:inventory_id>", methods=["GET", "POST"])
 @role_required(["admin", "supplier"])
 def edit_inventory_item(inventory_id):
-    inventory_item = Inventory.query.get_or_404(inventory_id)
-    product = Product.query.get_or_404(inventory_item.product_id)
+    inventory_item = db.get_or_404(Inventory, inventory_id, options=[joinedload(Inventory.product)]) # Item and its product in one SELECT
+    product = inventory_item.product
 
     # Security check: ensure supplier owns this inventory item\s product
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if not supplier_profile or product.supplier_id != supplier_profile.id:
             flash("You do not have permission to edit this inventory item.", "danger")
             abort(403)
@@ -875,7 +1066,6 @@ def edit_inventory_item(inventory_id):
             inventory_item.quantity_on_hand = form.quantity_on_hand.data
             inventory_item.reorder_level = form.reorder_level.data
             inventory_item.location = form.location.data
-            inventory_item.last_updated = datetime.utcnow()
             db.session.commit()
             flash("Inventory item updated successfully!", "success")
             return redirect(url_for("frontend.view_inventory"))
@@ -890,12 +1080,12 @@ def edit_inventory_item(inventory_id):
 @frontend_bp.route("/inventory/adjust_stock/<int:inventory_id>", methods=["GET", "POST"])
 @role_required(["admin", "supplier"])
 def adjust_stock(inventory_id):
-    inventory_item = Inventory.query.get_or_404(inventory_id)
-    product = Product.query.get_or_404(inventory_item.product_id)
+    inventory_item = db.get_or_404(Inventory, inventory_id, options=[joinedload(Inventory.product)]) # Item and its product in one SELECT
+    product = inventory_item.product
     form = AdjustStockForm()
 
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if not supplier_profile or product.supplier_id != supplier_profile.id:
             flash("You do not have permission to adjust stock for this item.", "danger")
             abort(403)
@@ -912,7 +1102,6 @@ def adjust_stock(inventory_id):
             else: # Increase
                 inventory_item.quantity_on_hand += adjustment
                 flash(f"Stock increased by {adjustment}. New stock: {inventory_item.quantity_on_hand}", "success")
-            inventory_item.last_updated = datetime.utcnow()
             db.session.commit()
         except Exception as e:
             db.session.rollback()
@@ -933,12 +1122,19 @@ def view_orders():
     search_term = request.args.get("search", "")
     status_filter = request.args.get("status", "all")
 
-    query = Order.query
+    # orders.html only dereferences order.placer; anything else would be an N+1, so fail fast
+    query = Order.query.options(joinedload(Order.placer), raiseload("*"))
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if supplier_profile:
-            # Filter orders that contain at least one item from this supplier
-            query = query.join(OrderItem).join(Product).filter(Product.supplier_id == supplier_profile.id).distinct()
+            # Filter orders that contain at least one item from this supplier. A correlated EXISTS stops at the
+            # first matching item, so there are no duplicate rows to DISTINCT away before paginating.
+            supplier_items = (
+                select(OrderItem.id)
+                .join(Product, Product.id == OrderItem.product_id)
+                .where(OrderItem.order_id == Order.id, Product.supplier_id == supplier_profile.id)
+            )
+            query = query.filter(supplier_items.exists())
         else:
             query = query.filter(False) # No supplier profile, no orders to show
             flash("Please set up your supplier profile to view orders.", "info")
@@ -946,17 +1142,22 @@ def view_orders():
         query = query.filter(Order.user_id == current_user.id)
     # Admin sees all orders by default
 
-    if search_term and current_user.is_admin: # Admin can search by order ID or customer name/email
+    # A numeric term is an order ID: primary-key equality instead of a LIKE over the id cast to text
+    if search_term.isdigit():
+        query = query.filter(Order.id == int(search_term))
+    elif search_term and current_user.is_admin: # Admin can also search by customer name/email (trigram-indexed on PostgreSQL)
         query = query.filter(or_(
-            Order.id.like(f"%{search_term}%"), 
             Order.customer_name.ilike(f"%{search_term}%"),
             Order.customer_email.ilike(f"%{search_term}%")
         ))
-    elif search_term: # Other users might search by order ID if allowed
-        query = query.filter(Order.id.like(f"%{search_term}%"))
+    elif search_term: # Other users can only search by order ID
+        query = query.filter(False)
 
     if status_filter != "all":
-        query = query.filter(Order.status == status_filter)
+        if status_filter.upper() in OrderStatus.__members__:
+            query = query.filter(Order.status == status_filter)
+        else:
+            query = query.filter(False) # Not a status any order can have
 
     orders_pagination = query.order_by(Order.order_date.desc()).paginate(page=page, per_page=10)
     return render_template("orders.html", title="Manage Orders", orders_pagination=orders_pagination, 
@@ -965,21 +1166,32 @@ def view_orders():
 @frontend_bp.route("/order/<int:order_id>")
 @login_required
 def view_order_detail(order_id):
-    order = Order.query.get_or_404(order_id)
-
     supplier_profile = None
 
+    # Security: a supplier may only view orders holding at least one of their items. Decided by a single
+    # EXISTS that stops at the first matching item, before the order and its items are loaded.
+    if current_user.is_supplier:
+        supplier_profile = current_supplier_profile()
+        supplier_items = (
+            select(OrderItem.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(OrderItem.order_id == order_id, Product.supplier_id == supplier_profile.id)
+        ) if supplier_profile else None
+        if supplier_items is None or not db.session.execute(select(supplier_items.exists())).scalar():
+            db.get_or_404(Order, order_id) # Unknown orders are still a 404
+            flash("You do not have permission to view this order or it contains no items from you.", "danger")
+            abort(403)
+
+    order = Order.query.options(
+        selectinload(Order.items).selectinload(OrderItem.product).joinedload(Product.supplier),
+        joinedload(Order.placer),
+    ).get_or_404(order_id)
+
     # Security: Ensure user has permission to view this order
     if current_user.is_general_user and order.user_id != current_user.id:
         flash("You do not have permission to view this order.", "danger")
         abort(403)
 
-    elif current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
-        if not supplier_profile or not any(item.product and item.product.supplier_id == supplier_profile.id for item in order.items):
-            flash("You do not have permission to view this order or it contains no items from you.", "danger")
-            abort(403)
-
     # Admin can view any order
     return render_template(
         "order_detail.html",
@@ -996,7 +1208,7 @@ def update_order_status(order_id):
     form = UpdateOrderStatusForm()
     if form.validate_on_submit(): # This form might not have fields if status is just from select
         new_status = request.form.get("status")
-        if new_status in ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"]:
+        if new_status in ORDER_STATUS_LABELS:
             order.status = new_status
             db.session.commit()
             flash(f"Order #{order.id} status updated to {new_status}.", "success")
@@ -1010,19 +1222,17 @@ def update_order_status(order_id):
 @frontend_bp.route("/order_item/update_status/<int:item_id>", methods=["POST"])
 @role_required("supplier")
 def update_supplier_order_item_status(item_id):
-    order_item = OrderItem.query.get_or_404(item_id)
+    order_item = OrderItem.query.options(joinedload(OrderItem.product)).get_or_404(item_id)
     order_id_for_redirect = request.form.get("order_id", order_item.order_id) # Get order_id for redirect
 
     # Security: Ensure the current supplier owns this order item
-    supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+    supplier_profile = current_supplier_profile()
     if not supplier_profile or order_item.product.supplier_id != supplier_profile.id:
         flash("You do not have permission to update this item's status.", "danger")
         return redirect(url_for("frontend.view_order_detail", order_id=order_id_for_redirect))
 
     new_status = request.form.get("status")
-    allowed_statuses = ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"]
-
-    if new_status and new_status in allowed_statuses:
+    if new_status in ORDER_STATUS_LABELS:
         try:
             order_item.status = new_status
             db.session.commit()
@@ -1054,39 +1264,76 @@ def shop_products():
         query = query.filter(Product.category == category_filter)
 
     products_pagination = query.order_by(Product.name).paginate(page=page, per_page=9) # 9 for 3x3 grid
-    categories = db.session.query(Product.category).distinct().order_by(Product.category).all()
-    category_names = [c[0] for c in categories if c[0]]
 
     return render_template("shop_products.html", title="Shop Products", 
                            products_pagination=products_pagination, 
                            search_term=search_term, 
-                           categories=category_names, 
                            current_category=category_filter)
 
+@frontend_bp.app_context_processor
+def inject_cart_size():
+    return dict(cart_size=cart_size) # Called by the nav badge only when it renders
+
+# Cart reads are built once at import and only take bound ids per call (an expanding IN, so one cached
+# compiled form serves every cart size), skipping statement construction on the cart and checkout paths
+CART_PRODUCT_COLUMNS = (Product.id, Product.name, Product.price, Inventory.id.label("inventory_id"), Inventory.quantity_on_hand,
+                        Inventory.reorder_level)
+CART_PRODUCTS_SELECT = (
+    select(*CART_PRODUCT_COLUMNS)
+    .outerjoin(Inventory, Inventory.product_id == Product.id)
+    .where(Product.id.in_(bindparam("product_ids", expanding=True)))
+)
+# Checkout: lock the inventory rows (SELECT ... FOR UPDATE) until commit, so concurrent orders queue up
+# instead of both passing the stock check. An inner join, as rows on the nullable side of an outer join
+# can't be locked; get_cart_products() reads any products it leaves out (no inventory record) unlocked.
+# Rows are locked in id order, so two checkouts with overlapping carts queue rather than deadlock.
+# SQLite has no row locks and omits the clause.
+CART_PRODUCTS_SELECT_FOR_UPDATE = (
+    select(*CART_PRODUCT_COLUMNS)
+    .join(Inventory, Inventory.product_id == Product.id)
+    .where(Product.id.in_(bindparam("product_ids", expanding=True)))
+    .order_by(Inventory.id)
+    .with_for_update(of=Inventory)
+)
+
+def get_cart_products(product_ids, lock_stock=False):
+    # One SELECT for the given products and their stock levels (quantity_on_hand is None without an
+    # inventory record), keyed by product id; replaces a Product and an Inventory lookup per cart line.
+    # With lock_stock the inventory rows are locked; products without one come from a second, unlocked
+    # read so callers still see them (as out of stock) rather than as missing.
+    product_ids = list(product_ids)
+    if not lock_stock:
+        rows = db.session.execute(CART_PRODUCTS_SELECT, {"product_ids": product_ids}).all()
+        return {row.id: row for row in rows}
+    products = {row.id: row for row in db.session.execute(CART_PRODUCTS_SELECT_FOR_UPDATE, {"product_ids": product_ids})}
+    unstocked_ids = [product_id for product_id in product_ids if product_id not in products]
+    if unstocked_ids:
+        products.update((row.id, row) for row in db.session.execute(CART_PRODUCTS_SELECT, {"product_ids": unstocked_ids}))
+    return products
+
 @frontend_bp.route("/cart/add/<int:product_id>", methods=["POST"])
 @login_required
 def add_to_cart(product_id):
-    product = Product.query.get_or_404(product_id)
-    inventory = Inventory.query.filter_by(product_id=product.id).first()
+    product = get_cart_products([product_id]).get(product_id)
+    if product is None:
+        abort(404)
     quantity_to_add = int(request.form.get("quantity", 1))
 
     if quantity_to_add <= 0:
         flash("Quantity must be positive.", "danger")
         return redirect(request.referrer or url_for("frontend.shop_products"))
 
-    if not inventory or inventory.quantity_on_hand < quantity_to_add:
-        flash(f"Not enough stock for {product.name}. Available: {inventory.quantity_on_hand if inventory else 0}", "warning")
+    if product.quantity_on_hand is None or product.quantity_on_hand < quantity_to_add:
+        flash(f"Not enough stock for {product.name}. Available: {product.quantity_on_hand or 0}", "warning")
         return redirect(request.referrer or url_for("frontend.shop_products"))
 
-    cart = session.get("cart", {})
-    current_quantity_in_cart = cart.get(str(product_id), 0)
+    cart = get_cart()
+    current_quantity_in_cart = cart.get(product_id, 0)
     
-    if inventory.quantity_on_hand < (current_quantity_in_cart + quantity_to_add):
-        flash(f"Cannot add {quantity_to_add} more of {product.name}. Total would exceed stock. Available: {inventory.quantity_on_hand}, In Cart: {current_quantity_in_cart}", "warning")
+    if product.quantity_on_hand < (current_quantity_in_cart + quantity_to_add):
+        flash(f"Cannot add {quantity_to_add} more of {product.name}. Total would exceed stock. Available: {product.quantity_on_hand}, In Cart: {current_quantity_in_cart}", "warning")
     else:
-        cart[str(product_id)] = current_quantity_in_cart + quantity_to_add
-        session["cart"] = cart
-        session.modified = True
+        add_cart_item(product_id, quantity_to_add)
         flash(f"{quantity_to_add} x {product.name} added to cart.", "success")
     
     return redirect(request.referrer or url_for("frontend.shop_products"))
@@ -1094,17 +1341,14 @@ def add_to_cart(product_id):
 @frontend_bp.route("/cart", methods=["GET"])
 @login_required
 def view_cart():
-    cart_session = session.get("cart", {})
+    cart = get_cart()
+    cart_changed = False
     cart_items_details = []
-    grand_total = 0
     remove_form = RemoveFromCartForm() # For removing individual items
     checkout_form = CreateOrderForm() # For the checkout details
 
     # Populate choices for order_category_id for the checkout_form
-    order_categories = OrderCategory.query.order_by(OrderCategory.name).all()
-    checkout_form.order_category_id.choices = [(oc.id, oc.name) for oc in order_categories]
-    if not checkout_form.order_category_id.choices:
-        checkout_form.order_category_id.choices = []
+    checkout_form.order_category_id.choices = get_order_category_choices()
 
     # Pre-fill customer details if available
     if request.method == "GET":
@@ -1112,83 +1356,112 @@ def view_cart():
         checkout_form.customer_email.data = checkout_form.customer_email.data or current_user.email
         # Add shipping address prefill if stored on user model
 
-    for product_id_str, quantity_in_cart in list(cart_session.items()): # Use list() for safe iteration if modifying
-        product = Product.query.get(int(product_id_str))
+    cart_products = get_cart_products(cart)
+    for product_id, quantity_in_cart in list(cart.items()): # Use list() for safe iteration if modifying
+        product = cart_products.get(product_id)
         if product:
-            inventory_item = Inventory.query.filter_by(product_id=product.id).first()
-            available_stock = inventory_item.quantity_on_hand if inventory_item else 0
+            available_stock = product.quantity_on_hand or 0
             
             # Adjust quantity in cart if it exceeds available stock (e.g., stock changed after adding)
             actual_quantity = min(quantity_in_cart, available_stock)
             if actual_quantity == 0 and quantity_in_cart > 0:
                 # Item is now out of stock, remove from cart or notify
-                cart_session.pop(product_id_str, None)
-                session.modified = True
+                cart.pop(product_id, None)
+                cart_changed = True
                 flash(f"{product.name} was removed from your cart as it is now out of stock.", "warning")
                 continue # Skip adding this item to display
             elif actual_quantity < quantity_in_cart:
-                cart_session[product_id_str] = actual_quantity
-                session.modified = True
+                cart[product_id] = actual_quantity
+                cart_changed = True
                 flash(f"Quantity for {product.name} adjusted to {actual_quantity} due to stock availability.", "info")
 
-            subtotal = product.price * actual_quantity
             cart_items_details.append({
                 "product_id": product.id, "name": product.name, "price": product.price,
-                "quantity": actual_quantity, "available_stock": available_stock, "subtotal": subtotal
+                "quantity": actual_quantity, "available_stock": available_stock, "subtotal": product.price * actual_quantity
             })
-            grand_total += subtotal
         else:
             # Product not found (e.g., deleted), remove from cart
-            cart_session.pop(product_id_str, None)
-            session.modified = True
-            flash(f"A product (ID: {product_id_str}) was removed from your cart as it no longer exists.", "warning")
+            cart.pop(product_id, None)
+            cart_changed = True
+            flash(f"A product (ID: {product_id}) was removed from your cart as it no longer exists.", "warning")
 
+    if cart_changed:
+        save_cart(cart)
+    grand_total = sum(item["subtotal"] for item in cart_items_details)
     return render_template("order_form.html", title="Your Cart & Checkout", 
                            cart_items=cart_items_details, grand_total=grand_total, 
                            remove_form=remove_form, checkout_form=checkout_form)
 
+def set_cart_quantity(cart, product_id, new_quantity, product):
+    # Applies a quantity change to a cart dict, capped at available stock; returns the quantity
+    # kept and the message/category to report
+    if new_quantity <= 0:
+        cart.pop(product_id, None)
+        return 0, "Item removed from cart.", "info"
+    if product is None or product.quantity_on_hand is None:
+        cart.pop(product_id, None) # Should not happen if in cart
+        return 0, "Product not found or inventory missing.", "danger"
+    if product.quantity_on_hand < new_quantity:
+        cart[product_id] = product.quantity_on_hand # Adjust to max available
+        return product.quantity_on_hand, f"Cannot update quantity for {product.name}. Only {product.quantity_on_hand} available.", "warning"
+    cart[product_id] = new_quantity
+    return new_quantity, f"Quantity for {product.name} updated.", "success"
+
 @frontend_bp.route("/cart/update/<int:product_id>", methods=["POST"])
 @login_required
 def update_cart_item(product_id):
-    cart = session.get("cart", {})
-    product_id_str = str(product_id)
+    cart = get_cart()
     new_quantity = int(request.form.get("quantity", 0))
 
-    if product_id_str in cart:
-        if new_quantity > 0:
-            product = Product.query.get(product_id)
-            inventory = Inventory.query.filter_by(product_id=product_id).first()
-            if product and inventory:
-                if inventory.quantity_on_hand < new_quantity:
-                    flash(f"Cannot update quantity for {product.name}. Only {inventory.quantity_on_hand} available.", "warning")
-                    cart[product_id_str] = inventory.quantity_on_hand # Adjust to max available
-                else:
-                    cart[product_id_str] = new_quantity
-                    flash(f"Quantity for {product.name} updated.", "success")
-            else:
-                flash("Product not found or inventory missing.", "danger") # Should not happen if in cart
-                cart.pop(product_id_str, None)
-        else: # Quantity is 0 or less, remove item
-            cart.pop(product_id_str, None)
-            flash("Item removed from cart.", "info")
-        session["cart"] = cart
-        session.modified = True
+    if product_id in cart:
+        product = get_cart_products([product_id]).get(product_id) if new_quantity > 0 else None
+        quantity, message, category = set_cart_quantity(cart, product_id, new_quantity, product)
+        flash(message, category)
+        set_cart_item(product_id, quantity)
     else:
         flash("Item not found in cart to update.", "warning")
     return redirect(url_for("frontend.view_cart"))
 
+@frontend_bp.route("/cart/update_json/<int:product_id>", methods=["POST"])
+@login_required
+def update_cart_item_json(product_id):
+    # In-place variant of update_cart_item for the cart page's fetch() calls: returns the new line
+    # quantity/subtotal instead of redirecting to a full view_cart render
+    cart = get_cart()
+    if product_id not in cart:
+        return jsonify({"message": "Item not found in cart to update."}), 404
+    # Only an explicit 0 removes the line; a cleared or mistyped field must not empty it
+    new_quantity = request.form.get("quantity", type=int)
+    if new_quantity is None or new_quantity < 0:
+        return jsonify({"message": "Please enter a whole number of 0 or more.", "category": "warning"}), 400
+    with_grand_total = request.args.get("grand_total", type=int) == 1
+
+    # Same single SELECT either way; it covers the whole cart only when the grand total is wanted
+    cart_products = get_cart_products(cart if with_grand_total else [product_id])
+    product = cart_products.get(product_id)
+    quantity, message, category = set_cart_quantity(cart, product_id, new_quantity, product)
+    set_cart_item(product_id, quantity)
+
+    data = {
+        "updated_qty": quantity,
+        "subtotal": product.price * quantity if product else 0,
+        "cart_count": len(cart),
+        "message": message,
+        "category": category,
+    }
+    if with_grand_total:
+        data["grand_total"] = sum(
+            cart_products[cart_product_id].price * qty for cart_product_id, qty in cart.items() if cart_product_id in cart_products
+        )
+    return jsonify(data)
+
 @frontend_bp.route("/cart/remove/<int:product_id>", methods=["POST"])
 @login_required
 def remove_from_cart(product_id):
     form = RemoveFromCartForm() # For CSRF validation
     if form.validate_on_submit():
-        cart = session.get("cart", {})
-        product_id_str = str(product_id)
-        if product_id_str in cart:
-            product_name = Product.query.get(product_id).name if Product.query.get(product_id) else "Item"
-            cart.pop(product_id_str, None)
-            session["cart"] = cart
-            session.modified = True
+        if remove_cart_item(product_id):
+            product_name = db.session.scalar(select(Product.name).where(Product.id == product_id)) or "Item"
             flash(f"{product_name} removed from cart.", "info")
         else:
             flash("Item not found in cart.", "warning")
@@ -1200,44 +1473,39 @@ def remove_from_cart(product_id):
 @frontend_bp.route("/cart/clear")
 @login_required
 def clear_cart():
-    # Clear the cart stored in the session
-    session.pop("cart", None)
-    session.modified = True
+    clear_cart_items()
     flash("Cart cleared.", "info")
     return redirect(url_for("frontend.view_cart"))
 
 @frontend_bp.route("/order/place", methods=["POST"])
 @login_required
 def place_order():
-    cart_session = session.get("cart", {})
-    if not cart_session:
+    cart = get_cart()
+    if not cart:
         flash("Your cart is empty. Cannot place order.", "warning")
         return redirect(url_for("frontend.view_cart"))
 
     form = CreateOrderForm() 
     # CRITICAL FIX: Populate choices for order_category_id BEFORE validation on POST
-    order_categories = OrderCategory.query.order_by(OrderCategory.name).all()
-    form.order_category_id.choices = [(oc.id, oc.name) for oc in order_categories]
-    if not form.order_category_id.choices:
-        form.order_category_id.choices = [] # Ensure choices is an empty list if no categories
+    form.order_category_id.choices = get_order_category_choices()
 
     if form.validate_on_submit():
         try:
             total_amount = 0
             order_items_to_create = []
             insufficient_stock_items = []
+            missing_product_ids = []
 
-            for product_id_str, quantity_in_cart in cart_session.items():
-                product_id = int(product_id_str)
-                product = Product.query.get(product_id)
+            # Stock levels are read and locked in the same transaction that decrements them below
+            cart_products = get_cart_products(cart, lock_stock=True)
+            for product_id, quantity_in_cart in cart.items():
+                product = cart_products.get(product_id)
                 if not product:
-                    flash(f"Product ID {product_id} not found. It may have been removed from the store.", "danger")
-                    # Potentially remove from cart here and ask user to review
-                    continue 
+                    missing_product_ids.append(product_id)
+                    continue
 
-                inventory_item = Inventory.query.filter_by(product_id=product.id).first()
-                if not inventory_item or inventory_item.quantity_on_hand < quantity_in_cart:
-                    insufficient_stock_items.append(f"{product.name} (Ordered: {quantity_in_cart}, Available: {inventory_item.quantity_on_hand if inventory_item else 0})")
+                if product.quantity_on_hand is None or product.quantity_on_hand < quantity_in_cart:
+                    insufficient_stock_items.append(f"{product.name} (Ordered: {quantity_in_cart}, Available: {product.quantity_on_hand or 0})")
                     continue # Skip this item, will be reported to user
                 
                 order_items_to_create.append({
@@ -1247,7 +1515,13 @@ def place_order():
                 })
                 total_amount += product.price * quantity_in_cart
             
+            if missing_product_ids:
+                db.session.rollback() # Release the stock row locks
+                flash(f"Order not placed. Product ID(s) {', '.join(map(str, missing_product_ids))} no longer exist; please remove them from your cart.", "danger")
+                return redirect(url_for("frontend.view_cart"))
+
             if insufficient_stock_items:
+                db.session.rollback()
                 flash("Order not placed. Some items have insufficient stock: " + ", ".join(insufficient_stock_items) + ". Please adjust your cart.", "danger")
                 return redirect(url_for("frontend.view_cart"))
             
@@ -1255,39 +1529,43 @@ def place_order():
                 flash("No valid items to order after stock check. Your cart might be empty or all items were out of stock.", "warning")
                 return redirect(url_for("frontend.view_cart"))
 
-            # Create the order
-            new_order = Order(
-                user_id=current_user.id,
-                total_amount=total_amount,
-                status="Pending",
-                shipping_address=form.shipping_address.data, # From form
-                customer_name=form.customer_name.data or current_user.username, # From form or current user
-                customer_email=form.customer_email.data or current_user.email # From form or current user
-                # order_category_id = form.order_category_id.data # If you have categories for orders
-            )
-            db.session.add(new_order)
-            db.session.flush() # Get the new_order.id before committing fully
-
-            # Create order items and decrement stock
-            for item_data in order_items_to_create:
-                order_item_entry = OrderItem(
-                    order_id=new_order.id,
-                    product_id=item_data["product"].id,
-                    quantity=item_data["quantity"],
-                    price_at_purchase=item_data["price_at_purchase"]
-                )
-                db.session.add(order_item_entry)
-                
-                # Decrement stock
-                inventory_item = Inventory.query.filter_by(product_id=item_data["product"].id).first()
-                if inventory_item: # Should always exist if stock check passed
-                    inventory_item.quantity_on_hand -= item_data["quantity"]
-                    inventory_item.last_updated = datetime.utcnow()
+            # Create the order; INSERT ... RETURNING hands back its id in the same round-trip, no flush needed.
+            # The dashboard counters are bumped below rather than recomputed after each bulk statement.
+            new_order_id = db.session.execute(insert(Order).returning(Order.id), {
+                "user_id": current_user.id,
+                "total_amount": total_amount,
+                "status": "Pending",
+                "shipping_address": form.shipping_address.data, # From form
+                "customer_name": form.customer_name.data or current_user.username, # From form or current user
+                "customer_email": form.customer_email.data or current_user.email, # From form or current user
+                # "order_category_id": form.order_category_id.data, # If you have categories for orders
+            }, execution_options=COUNTERS_APPLIED).scalar_one()
+
+            # Create order items with one executemany INSERT; no OrderItem objects are needed afterwards
+            db.session.execute(insert(OrderItem), [{
+                "order_id": new_order_id,
+                "product_id": item_data["product"].id,
+                "quantity": item_data["quantity"],
+                "price_at_purchase": item_data["price_at_purchase"],
+            } for item_data in order_items_to_create])
+
+            # Decrement stock for every line in one executemany UPDATE by primary key, from the levels read above
+            db.session.execute(update(Inventory), [{
+                "id": item_data["product"].inventory_id,
+                "quantity_on_hand": item_data["product"].quantity_on_hand - item_data["quantity"],
+            } for item_data in order_items_to_create], execution_options=COUNTERS_APPLIED)
+            connection = db.session.connection()
+            bump(connection, "open_orders", 1) # Placed as Pending
+            bump(connection, "low_stock_count", sum(
+                int(is_low_stock(item_data["product"].quantity_on_hand - item_data["quantity"], item_data["product"].reorder_level))
+                - int(is_low_stock(item_data["product"].quantity_on_hand, item_data["product"].reorder_level))
+                for item_data in order_items_to_create
+            ))
             
             db.session.commit() # Commit order, items, and stock changes together
-            session.pop("cart", None) # Clear cart after successful order
+            clear_cart_items() # Clear cart after successful order
             flash("Order placed successfully!", "success")
-            return redirect(url_for("frontend.view_order_detail", order_id=new_order.id))
+            return redirect(url_for("frontend.view_order_detail", order_id=new_order_id))
 
         except IntegrityError as ie:
             db.session.rollback()
@@ -1304,21 +1582,18 @@ def place_order():
         flash("Please correct the errors in the checkout form.", "danger")
         # Re-render cart page with form errors. Need to pass cart details again.
         cart_items_details = []
-        grand_total = 0
-        cart_session = session.get("cart", {})
         remove_form = RemoveFromCartForm()
-        for product_id_str, quantity_in_cart in list(cart_session.items()):
-            product = Product.query.get(int(product_id_str))
+        cart_products = get_cart_products(cart)
+        for product_id, quantity_in_cart in cart.items():
+            product = cart_products.get(product_id)
             if product:
-                inventory_item = Inventory.query.filter_by(product_id=product.id).first()
-                available_stock = inventory_item.quantity_on_hand if inventory_item else 0
+                available_stock = product.quantity_on_hand or 0
                 actual_quantity = min(quantity_in_cart, available_stock)
-                subtotal = product.price * actual_quantity
                 cart_items_details.append({
                     "product_id": product.id, "name": product.name, "price": product.price,
-                    "quantity": actual_quantity, "available_stock": available_stock, "subtotal": subtotal
+                    "quantity": actual_quantity, "available_stock": available_stock, "subtotal": product.price * actual_quantity
                 })
-                grand_total += subtotal
+        grand_total = sum(item["subtotal"] for item in cart_items_details)
         return render_template("order_form.html", title="Your Cart & Checkout", 
                                cart_items=cart_items_details, grand_total=grand_total, 
                                remove_form=remove_form, checkout_form=form) # Pass the invalid form back as 'checkout_form'
@@ -1335,9 +1610,9 @@ def profile():
         current_user.email = profile_form.email.data
         if profile_form.picture.data:
             try:
-                # Pass current_app and current_user to save_profile_picture
-                picture_file = save_profile_picture(profile_form.picture.data, current_app, current_user)
-                current_user.image_file = picture_file # Corrected attribute name to image_file
+                # Pass current_app and current_user to save_profile_picture; image_file is updated once the thumbnail is ready
+                save_profile_picture(profile_form.picture.data, current_app, current_user)
+                flash("Your new profile picture is being processed and will appear shortly.", "info")
             except Exception as e:
                 flash(f"Error saving profile picture: {e}", "danger")
         try:
@@ -1353,8 +1628,8 @@ def profile():
             flash("An unexpected error occurred while updating your profile.", "danger")
 
     if password_form.submit_password.data and password_form.validate():
-        if check_password_hash(current_user.password_hash, password_form.old_password.data):
-            current_user.password_hash = generate_password_hash(password_form.new_password.data)
+        if current_user.check_password(password_form.old_password.data):
+            current_user.set_password(password_form.new_password.data)
             try:
                 db.session.commit()
                 flash("Your password has been updated!", "success")
@@ -1392,12 +1667,15 @@ def manage_order_categories():
             flash("An error occurred while adding the order category.", "danger")
     
     categories = OrderCategory.query.order_by(OrderCategory.name).all()
+    if request.method == "GET":
+        fingerprint = [(category.id, category.name, category.description) for category in categories]
+        return render_revalidated_page("order_categories.html", fingerprint, title="Manage Order Categories", form=form, categories=categories)
     return render_template("order_categories.html", title="Manage Order Categories", form=form, categories=categories)
 
 @frontend_bp.route("/admin/order_category/edit/<int:category_id>", methods=["GET", "POST"])
 @role_required("admin")
 def edit_order_category(category_id):
-    category = OrderCategory.query.get_or_404(category_id)
+    category = db.get_or_404(OrderCategory, category_id)
     form = OrderCategoryForm(obj=category)
     if form.validate_on_submit():
         try:
@@ -1417,14 +1695,24 @@ def edit_order_category(category_id):
 @frontend_bp.route("/admin/order_category/delete/<int:category_id>", methods=["POST"])
 @role_required("admin")
 def delete_order_category(category_id):
-    category = OrderCategory.query.get_or_404(category_id)
-    # Check if category is in use by products or orders before deleting
-    if Product.query.filter_by(category=category.name).first() or Order.query.filter_by(order_category_id=category.id).first():
-        flash(f"Cannot delete category \'{category.name}\\' as it is currently in use by products or orders.", "danger")
-        return redirect(url_for("frontend.manage_order_categories"))
+    category = db.get_or_404(OrderCategory, category_id)
     try:
-        db.session.delete(category)
+        # The in-use check is part of the DELETE itself: the row only goes if no product or order uses the
+        # category, decided in the same statement, so there is no separate SELECT and no window in between
+        result = db.session.execute(
+            delete(OrderCategory)
+            .where(
+                OrderCategory.id == category.id,
+                ~exists().where(Product.category == category.name),
+                ~exists().where(Order.order_category_id == category.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            flash(f"Cannot delete category \'{category.name}\\' as it is currently in use by products or orders.", "danger")
+            return redirect(url_for("frontend.manage_order_categories"))
         db.session.commit()
+        cache.delete("order_category_choices") # Statement deletes skip the mapper events
         flash("Order category deleted successfully!", "success")
     except Exception as e:
         db.session.rollback()
@@ -1452,11 +1740,11 @@ def error_403(error):
 @frontend_bp.route("/inventory/delete/<int:inventory_id>", methods=["POST"])
 @role_required(["admin", "supplier"])
 def delete_inventory_item(inventory_id):
-    inventory_item = Inventory.query.get_or_404(inventory_id)
-    product = Product.query.get_or_404(inventory_item.product_id) # For supplier check
+    inventory_item = db.get_or_404(Inventory, inventory_id, options=[joinedload(Inventory.product)])
+    product = inventory_item.product # For supplier check
 
     if current_user.is_supplier:
-        supplier_profile = Supplier.query.filter_by(user_id=current_user.id).first()
+        supplier_profile = current_supplier_profile()
         if not supplier_profile or product.supplier_id != supplier_profile.id:
             flash("You do not have permission to delete this inventory item.", "danger")
             abort(403)
@@ -3,7 +3,7 @@ import secrets
 from PIL import Image # For resizing images
 from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, current_app, session
 from werkzeug.security import generate_password_hash, check_password_hash
-from src.main import db
+from src.extensions import db
 from src.models.user import User
 from src.models.supplier import Supplier
 from src.models.product import Product
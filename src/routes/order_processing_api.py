@@ -1,9 +1,14 @@
 from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+from sqlalchemy import insert, select, update
 from src.extensions import db
 from src.models.purchase_order import PurchaseOrder
 from src.models.product import Product
 from src.models.supplier import Supplier
 from src.models.inventory import Inventory
+from src.models.order import Order, OrderItem
+from src.models.order_category import OrderCategory
+from src.models.dashboard_counters import COUNTERS_APPLIED, bump, is_low_stock
 from datetime import datetime
 
 order_processing_bp = Blueprint("order_processing_api", __name__, url_prefix="/api")
@@ -153,5 +158,120 @@ def delete_purchase_order(order_id):
         db.session.rollback()
         return jsonify({"error": f"Failed to delete purchase order: {str(e)}"}), 500
 
+# --- Bulk Order Creation ---
+
+def is_json_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) # JSON true/false arrive as bools, which are ints
+
+def validate_bulk_orders(payload):
+    """Return an error message for a malformed bulk payload, or None if it is well-formed."""
+    if not isinstance(payload, list) or not payload:
+        return "Expected a non-empty JSON list of orders."
+    for index, order_data in enumerate(payload):
+        if not isinstance(order_data, dict):
+            return f"Order {index} must be an object."
+        if order_data.get("order_category_id") is not None and not is_json_int(order_data["order_category_id"]):
+            return f"Order {index} has an order_category_id that is not an integer."
+        items = order_data.get("items")
+        if not isinstance(items, list) or not items:
+            return f"Order {index} must have a non-empty items list."
+        for item in items:
+            if not isinstance(item, dict) or not is_json_int(item.get("product_id")):
+                return f"Order {index} has an item without an integer product_id."
+            quantity = item.get("quantity")
+            if not is_json_int(quantity) or quantity <= 0:
+                return f"Order {index} has an item whose quantity is not a positive integer."
+    return None
+
+@order_processing_bp.route("/bulk", methods=["POST"])
+@login_required
+def create_orders_bulk():
+    """Create several orders (and their items) in one request and one transaction."""
+    payload = request.get_json(silent=True)
+    error = validate_bulk_orders(payload)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # Unknown categories are reported up front rather than failing the INSERT on the foreign key
+    category_ids = {order_data["order_category_id"] for order_data in payload if order_data.get("order_category_id") is not None}
+    if category_ids:
+        unknown = category_ids - set(db.session.scalars(select(OrderCategory.id).where(OrderCategory.id.in_(category_ids))))
+        if unknown:
+            return jsonify({"error": f"Order categories not found: {', '.join(map(str, sorted(unknown)))}"}), 400
+
+    # One SELECT for every product referenced by the batch, with its stock level. The inventory rows stay
+    # locked until commit, so the decrements below can't overwrite a concurrent checkout's; locking in id
+    # order keeps two overlapping batches from deadlocking.
+    requested = {}
+    for order_data in payload:
+        for item in order_data["items"]:
+            requested[item["product_id"]] = requested.get(item["product_id"], 0) + item["quantity"]
+    stock_rows = db.session.execute(
+        select(Product.id, Product.price, Inventory.id.label("inventory_id"), Inventory.quantity_on_hand, Inventory.reorder_level)
+        .join(Inventory, Inventory.product_id == Product.id) # FOR UPDATE can't lock the nullable side of an outer join
+        .where(Product.id.in_(requested))
+        .order_by(Inventory.id)
+        .with_for_update(of=Inventory)
+    ).all()
+    stock = {row.id: row for row in stock_rows}
+
+    unstocked = set(requested) - set(stock)
+    if unstocked: # Either unknown products or products without an inventory record
+        known = set(db.session.scalars(select(Product.id).where(Product.id.in_(unstocked))))
+        missing = sorted(unstocked - known)
+        if missing:
+            db.session.rollback()
+            return jsonify({"error": f"Products not found: {', '.join(map(str, missing))}"}), 404
+    insufficient = [
+        {"product_id": product_id, "ordered": quantity, "available": stock[product_id].quantity_on_hand if product_id in stock else 0}
+        for product_id, quantity in requested.items()
+        if product_id not in stock or stock[product_id].quantity_on_hand < quantity
+    ]
+    if insufficient:
+        db.session.rollback() # Release the row locks
+        return jsonify({"error": "Insufficient stock.", "items": insufficient}), 400
+
+    try:
+        order_rows = [{
+            "user_id": current_user.id,
+            "status": "Pending",
+            "total_amount": sum(stock[item["product_id"]].price * item["quantity"] for item in order_data["items"]),
+            "shipping_address": order_data.get("shipping_address"),
+            "customer_name": order_data.get("customer_name") or current_user.username,
+            "customer_email": order_data.get("customer_email") or current_user.email,
+            "order_category_id": order_data.get("order_category_id"),
+        } for order_data in payload]
+        # executemany INSERT ... RETURNING: ids come back in payload order without a flush per order
+        # The dashboard counters are bumped below rather than recomputed after each bulk statement
+        order_ids = db.session.scalars(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True), order_rows, execution_options=COUNTERS_APPLIED
+        ).all()
+
+        item_rows = [{
+            "order_id": order_id,
+            "product_id": item["product_id"],
+            "quantity": item["quantity"],
+            "price_at_purchase": stock[item["product_id"]].price,
+        } for order_id, order_data in zip(order_ids, payload) for item in order_data["items"]]
+        db.session.execute(insert(OrderItem), item_rows)
+
+        db.session.execute(update(Inventory), [{
+            "id": stock[product_id].inventory_id,
+            "quantity_on_hand": stock[product_id].quantity_on_hand - quantity,
+        } for product_id, quantity in requested.items()], execution_options=COUNTERS_APPLIED)
+        connection = db.session.connection()
+        bump(connection, "open_orders", len(order_ids)) # All created as Pending
+        bump(connection, "low_stock_count", sum(
+            int(is_low_stock(stock[product_id].quantity_on_hand - quantity, stock[product_id].reorder_level))
+            - int(is_low_stock(stock[product_id].quantity_on_hand, stock[product_id].reorder_level))
+            for product_id, quantity in requested.items()
+        ))
+
+        db.session.commit()
+        return jsonify({"message": f"{len(order_ids)} orders created successfully", "order_ids": order_ids}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 # Add other order processing related endpoints if needed
 
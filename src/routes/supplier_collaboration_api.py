@@ -1,9 +1,10 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
+from sqlalchemy import select, update
 from src.extensions import db
 from src.models.supplier import Supplier
 from src.models.supplier_interaction import SupplierMessage, SupplierReview
-from src.models.order import Order, OrderItem # Added Order, OrderItem
+from src.models.order import Order, OrderItem, ORDER_STATUS_LABELS # Added Order, OrderItem
 from src.models.product import Product # Added Product
 
 supplier_collaboration_bp = Blueprint("supplier_collaboration_api", __name__, url_prefix="/api/suppliers") # Changed url_prefix to match main.py
@@ -104,7 +105,7 @@ def get_supplier_order_items():
     
     try:
         # Query OrderItems, joining with Product to filter by supplier_id
-        order_items = db.session.query(OrderItem).join(Product, OrderItem.product_id == Product.id).filter(Product.supplier_id == supplier_id).all()
+        order_items = db.session.query(OrderItem).join(Product, OrderItem.product_id == Product.id).options(db.contains_eager(OrderItem.product)).filter(Product.supplier_id == supplier_id).all()
         
         # Serialize the order items. Consider adding more details if needed.
         result = []
@@ -135,22 +136,26 @@ def update_supplier_order_item_status(item_id):
     if not new_status:
         return jsonify({"error": "Missing 'status' in request body"}), 400
 
-    # Define allowed statuses (should match admin's options)
-    allowed_statuses = ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"]
-    if new_status not in allowed_statuses:
-        return jsonify({"error": f"Invalid status. Allowed statuses are: {', '.join(allowed_statuses)}"}), 400
+    # Same options as the admin's status form
+    if new_status not in ORDER_STATUS_LABELS:
+        return jsonify({"error": f"Invalid status. Allowed statuses are: {', '.join(ORDER_STATUS_LABELS)}"}), 400
 
     supplier_id = current_user.id # Assuming supplier user's ID is the supplier_id
 
     try:
-        order_item = db.session.query(OrderItem).join(Product, OrderItem.product_id == Product.id).filter(OrderItem.id == item_id, Product.supplier_id == supplier_id).first()
-
-        if not order_item:
+        # The ownership check is part of the UPDATE's WHERE clause; no row is loaded just to test that it exists
+        result = db.session.execute(
+            update(OrderItem)
+            .where(OrderItem.id == item_id, OrderItem.product_id.in_(select(Product.id).where(Product.supplier_id == supplier_id)))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
             return jsonify({"error": "Order item not found or you do not have permission to update it."}), 404
 
-        order_item.status = new_status
         db.session.commit()
-        return jsonify({"message": "Order item status updated successfully", "order_item_id": order_item.id, "new_status": order_item.status})
+        return jsonify({"message": "Order item status updated successfully", "order_item_id": item_id, "new_status": new_status})
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -1,30 +1,75 @@
 import os
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
-# Helper function to save profile pictures
+PROFILE_PICTURE_SIZE = (125, 125)
+Image.MAX_IMAGE_PIXELS = 25_000_000 # Refuse decompression bombs long before they exhaust memory
+
+# Resizing runs off the request thread. Pillow releases the GIL while decoding/encoding,
+# so the pool uses spare cores instead of holding up a worker.
+resize_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="profile-pics")
+
+def profile_pics_dir(app):
+    return os.path.join(app.root_path, "static/profile_pics")
+
+def resize_profile_picture(app, upload_path, picture_fn, user_id):
+    # Writes the thumbnail under its new name, then points the user at it. Until then the user keeps the
+    # old picture, so a published file name only ever holds the finished thumbnail.
+    picture_path = os.path.join(profile_pics_dir(app), picture_fn)
+    tmp_path = picture_path + ".tmp"
+    try:
+        with Image.open(upload_path) as i:
+            image_format = i.format
+            i.draft("RGB", PROFILE_PICTURE_SIZE) # JPEG: let the decoder downscale instead of decoding every pixel
+            i.thumbnail(PROFILE_PICTURE_SIZE)
+            i.save(tmp_path, format=image_format, optimize=True)
+        os.replace(tmp_path, picture_path) # The name appears complete or not at all
+    finally:
+        os.remove(upload_path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    from src.extensions import db
+    from src.models.user import User
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        if user is None: # Account removed meanwhile
+            os.remove(picture_path)
+            return
+        old_picture = user.image_file
+        user.image_file = picture_fn
+        db.session.commit()
+    if old_picture and old_picture != "default.jpg":
+        try:
+            os.remove(os.path.join(profile_pics_dir(app), old_picture))
+        except OSError as e:
+            app.logger.error(f"Error deleting old profile picture {old_picture}: {e}")
+
+def log_resize_failure(app, picture_fn):
+    def callback(future):
+        if future.exception() is not None:
+            app.logger.error(f"Error processing profile picture {picture_fn}", exc_info=future.exception())
+    return callback
+
+# Helper function to save profile pictures. The upload is only staged here; the user's image_file
+# changes once the background resize has produced the thumbnail.
 def save_profile_picture(form_picture, current_app_instance, current_user_instance):
-    random_hex = secrets.token_hex(8)
+    app = current_app_instance._get_current_object()
     _, f_ext = os.path.splitext(form_picture.filename)
-    picture_fn = random_hex + f_ext
-    picture_path = os.path.join(current_app_instance.root_path, "static/profile_pics", picture_fn)
-
-    output_dir = os.path.join(current_app_instance.root_path, "static/profile_pics")
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    output_size = (125, 125) # Resize image
-    i = Image.open(form_picture)
-    i.thumbnail(output_size)
-    i.save(picture_path)
-
-    if current_user_instance.image_file != "default.jpg":
-        old_picture_path = os.path.join(current_app_instance.root_path, "static/profile_pics", current_user_instance.image_file)
-        if os.path.exists(old_picture_path):
-            try:
-                os.remove(old_picture_path)
-            except Exception as e:
-                current_app_instance.logger.error(f"Error deleting old profile picture {current_user_instance.image_file}: {e}")
+    picture_fn = secrets.token_hex(8) + f_ext.lower()
 
-    return picture_fn
+    upload_dir = os.path.join(app.instance_path, "profile_uploads") # Outside static/, never served
+    os.makedirs(upload_dir, exist_ok=True)
+    os.makedirs(profile_pics_dir(app), exist_ok=True)
 
+    # Only the header is read here: rejects non-images and oversized ones without decoding pixels
+    with Image.open(form_picture.stream):
+        pass
+    form_picture.stream.seek(0)
+    upload_path = os.path.join(upload_dir, picture_fn)
+    form_picture.save(upload_path)
+
+    future = resize_executor.submit(resize_profile_picture, app, upload_path, picture_fn, current_user_instance.id)
+    future.add_done_callback(log_resize_failure(app, picture_fn))
+    return picture_fn
@@ -4,6 +4,7 @@ from src.models.supplier import Supplier
 from src.models.product import Product
 from src.models.inventory import Inventory
 from src.models.purchase_order import PurchaseOrder
+from src.models.dashboard_counters import delete_product_inventory
 from sqlalchemy import func, case
 
 visibility_bp = Blueprint("supply_chain_visibility_api", __name__, url_prefix="/api")
@@ -185,7 +186,7 @@ def delete_product(product_id):
     try:
         # Need to handle related inventory, orders etc. before deleting
         # For simplicity, let's delete associated inventory first
-        Inventory.query.filter_by(product_id=product_id).delete()
+        delete_product_inventory(product_id)
         # Add checks/handling for orders referencing this product if necessary
 
         db.session.delete(product)